@@ -5,6 +5,7 @@ from . import op_symmetrize
 from . import op_symmetrize_group
 from . import op_symmetrize_preview
 from . import op_normal_symmetrize
+from . import mirror_cache
 from .utils import check_register, check_unregister
 
 
@@ -14,6 +15,21 @@ translation_dict = {
         ("*", "Symmetrize meshes, shape keys, vertex groups, UVs, and normals"): "メッシュ・シェイプキー・頂点グループ・UV・法線を対称化",
         ("*", "UnSymmetrize L/R Facial ShapeKeys"): "L/Rの表情シェイプキーを非対称化",
         ("*", "Remove Mirror Modifier"): "ミラーモディファイアがあれば削除",
+        ("*", "All UV Maps"): "すべてのUVマップ",
+        ("*", "Store Mirror Map"): "ミラー対応をメッシュに保存",
+        ("*", "Keep Topology"): "トポロジーを維持",
+        ("*", "Only Selected"): "選択範囲のみ",
+        ("*", "Symmetrize the edit mesh, shape keys, vertex groups, and UVs without leaving Edit Mode"): "編集モードのままメッシュ・シェイプキー・頂点グループ・UVを対称化",
+        ("*", "Re-symmetrize only the selected vertices and their mirror partners in place, keeping topology"): "選択頂点とそのミラー側の頂点だけを、トポロジーを維持したまま対称化します",
+        ("*", "Selected Objects"): "選択オブジェクトすべて",
+        ("*", "Symmetrize every selected mesh, processing meshes shared by linked duplicates once"): "選択中のすべてのメッシュを対称化します（リンク複製で共有されたメッシュは1回だけ処理）",
+        ("*", "Stream Shape Keys"): "シェイプキーを分割処理",
+        ("*", "Symmetrize shape keys outside BMesh in batches to limit memory use"): "メモリ使用量を抑えるため、シェイプキーをBMeshの外で分割して対称化します",
+        ("*", "Mirror positions in place when the mesh already has a complete mirror map, keeping element indices"): "完全なミラー対応がある場合は頂点座標だけを対称化し、要素のインデックスを維持します",
+        ("*", "Profile Memory"): "メモリ使用量を計測",
+        ("*", "Record peak Python/NumPy allocation for each stage (slower)"): "処理段階ごとのPython/NumPyのピークメモリを記録します（低速）",
+        ("*", "Profile Log"): "プロファイルログ",
+        ("*", "Append each run's stage profile to this file as a JSON line"): "実行ごとの処理段階の記録をJSON行としてこのファイルに追記します",
         ("*", "Object is not a mesh"): "オブジェクトがメッシュではありません",
         ("*", "Symmetrize meshes, shape keys, vertex groups, UVs, and normals while maintaining multi-resolution"): "マルチレゾを維持してメッシュ・シェイプキー・頂点グループ・UV・法線を対称化",
 
@@ -48,13 +64,27 @@ class PREFERENCE_mio3symm(AddonPreferences):
         update=update_use_uv_group,
     )
 
+    profile_memory: BoolProperty(
+        name="Profile Memory",
+        default=False,
+        description="Record peak Python/NumPy allocation for each stage (slower)",
+    )
+    profile_log_path: StringProperty(
+        name="Profile Log",
+        subtype="FILE_PATH",
+        description="Append each run's stage profile to this file as a JSON line",
+    )
+
     def draw(self, context):
         layout = self.layout
         layout.use_property_decorate = False
         layout.prop(self, "use_uv_group")
+        layout.prop(self, "profile_memory")
+        layout.prop(self, "profile_log_path")
 
 
 modules = [
+    mirror_cache,
     op_symmetrize,
     op_symmetrize_preview,
     op_symmetrize_group,
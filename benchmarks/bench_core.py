@@ -0,0 +1,158 @@
+"""core.py のベンチマーク（Blender なしの CPython で実行できる）
+
+python benchmarks/bench_core.py [--sizes 10000 100000 1000000] [--repeat 5] [--output results.json]
+                                [--baseline baseline.json] [--tolerance 1.25]
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import numpy as np
+
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_module(name):
+    # パッケージの __init__ は bpy を読み込むので、ファイルを直接読み込む
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ADDON_DIR, name + ".py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+core = load_module("core")
+utils_mirror = load_module("utils_mirror")
+
+
+def create_grid(verts, seed=0):
+    """X=0 を挟んで左右対称なグリッドのメッシュ配列"""
+    ny = max(2, int(np.sqrt(verts)))
+    nx = max(2, verts // ny)
+    nx += nx % 2
+    gx, gy = np.meshgrid(np.linspace(-1.0, 1.0, nx), np.linspace(-1.0, 1.0, ny))
+    co = np.stack((gx.ravel(), gy.ravel(), 0.1 * np.sin(gx.ravel() * 3.0) ** 2), axis=1).astype(np.float32)
+
+    index = np.arange(nx * ny, dtype=np.int32).reshape(ny, nx)
+    loop_vert = np.stack((index[:-1, :-1], index[:-1, 1:], index[1:, 1:], index[1:, :-1]), axis=-1).reshape(-1)
+    p_len = len(loop_vert) // 4
+    loop_start = np.arange(0, len(loop_vert), 4, dtype=np.int32)
+    loop_total = np.full(p_len, 4, dtype=np.int32)
+    loop_face = np.repeat(np.arange(p_len, dtype=np.int32), 4)
+
+    rng = np.random.default_rng(seed)
+    edges = np.concatenate(
+        (
+            np.stack((index[:, :-1].ravel(), index[:, 1:].ravel()), axis=1),
+            np.stack((index[:-1, :].ravel(), index[1:, :].ravel()), axis=1),
+        )
+    )
+    return {
+        "co": co,
+        "loop_vert": loop_vert,
+        "loop_start": loop_start,
+        "loop_total": loop_total,
+        "loop_face": loop_face,
+        "edges": edges,
+        "rng": rng,
+    }
+
+
+def cases(mesh):
+    co = mesh["co"]
+    loop_vert, loop_start, loop_total, loop_face = (
+        mesh["loop_vert"],
+        mesh["loop_start"],
+        mesh["loop_total"],
+        mesh["loop_face"],
+    )
+    rng = mesh["rng"]
+    vert_map, _, loop_map = core.build_mirror_maps(co, loop_vert, loop_start, loop_total, loop_face)
+    is_target, targets, sources, centers = core.recovery_sides(co, vert_map)
+
+    uv = rng.random((len(loop_vert), 2), dtype=np.float32)
+    pivot_u = np.full(len(loop_vert), 0.5)
+    normals = rng.normal(size=(len(loop_vert), 3)).astype(np.float32)
+    loops = np.flatnonzero(is_target[loop_vert] & (loop_map >= 0))
+
+    names = ["Group{}{}".format(i, side) for i in range(64) for side in ("_L", "_R", "")]
+    partner = core.pair_names(names, utils_mirror.get_mirror_name)
+    group_ids = rng.integers(0, len(names), len(co) * 4, dtype=np.int32)
+
+    basis = co.copy()
+    key = co + rng.normal(0.0, 0.01, co.shape).astype(np.float32)
+    mask_indices = np.flatnonzero(co[:, 0] > 0.0)
+    basis_masked = basis[mask_indices]
+
+    face_group = rng.integers(0, 4, len(loop_start), dtype=np.int32)
+
+    yield "find_x_mirror_indices", lambda: core.find_x_mirror_indices(co)
+    yield "build_mirror_maps", lambda: core.build_mirror_maps(co, loop_vert, loop_start, loop_total, loop_face)
+    yield "is_complete_mirror_map", lambda: core.is_complete_mirror_map(vert_map, mesh["edges"])
+    yield "mirror_positions", lambda: core.mirror_positions(co.copy(), targets, sources, centers)
+    yield "mirror_uv", lambda: core.mirror_uv(uv, pivot_u)
+    yield "reflect_x", lambda: core.reflect_x(normals.copy(), loops, normals, loop_map[loops])
+    yield "swap_weight_groups", lambda: core.swap_weight_groups(partner, group_ids)
+    yield "pair_names", lambda: core.pair_names(names, utils_mirror.get_mirror_name)
+    yield "unsymmetrize_key", lambda: core.unsymmetrize_key(key.copy(), basis.copy(), basis_masked, mask_indices)
+    yield "partition_preview_groups", lambda: core.partition_preview_groups(uv, loop_start, loop_total, face_group, 4)
+    groups, _ = core.partition_preview_groups(uv, loop_start, loop_total, face_group, 4)
+    yield "mirror_preview_group", lambda: core.mirror_preview_group(uv, groups[1][0], 0.5, 0.0)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="bench_core.py")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default="")
+    parser.add_argument("--baseline", default="")
+    parser.add_argument("--tolerance", type=float, default=1.25)
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        mesh = create_grid(size)
+        for name, func in cases(mesh):
+            times = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                func()
+                times.append(time.perf_counter() - start)
+            case = "core.{}/grid/{}".format(name, size)
+            results.append({"case": case, "verts": len(mesh["co"]), "times": times, "median": statistics.median(times)})
+            print("{:<60} {:>10.4f} s".format(case, results[-1]["median"]), file=sys.stderr)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            limits = {entry["case"]: entry["median"] * args.tolerance for entry in json.load(f)["results"]}
+        for entry in results:
+            if entry["case"] in limits and entry["median"] > limits[entry["case"]]:
+                regressions.append({"case": entry["case"], "median": entry["median"], "limit": limits[entry["case"]]})
+
+    report = {
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "timestamp": time.time(),
+        "results": results,
+        "regressions": regressions,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+    for regression in regressions:
+        print("REGRESSION {case}: {median:.4f} s > {limit:.4f} s".format(**regression), file=sys.stderr)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""ベンチマーク用の合成メッシュを生成する"""
+
+import math
+import bpy
+import bmesh
+import numpy as np
+
+SIDE_SUFFIXES = ("_L", "_R")
+
+
+def grid_size(verts):
+    """頂点数がおよそ verts になる X 方向に偶数のグリッドサイズ"""
+    ny = max(2, int(math.sqrt(verts)))
+    nx = max(2, verts // ny)
+    return nx + nx % 2, ny
+
+
+def create_grid_mesh(name, verts):
+    """X=0 を挟んで左右対称なグリッド（中心線上に頂点を持たない）"""
+    nx, ny = grid_size(verts)
+    xs = np.linspace(-1.0, 1.0, nx, dtype=np.float32)
+    ys = np.linspace(-1.0, 1.0, ny, dtype=np.float32)
+    gx, gy = np.meshgrid(xs, ys)
+    co = np.empty((nx * ny, 3), dtype=np.float32)
+    co[:, 0] = gx.ravel()
+    co[:, 1] = gy.ravel()
+    co[:, 2] = 0.1 * np.sin(gx.ravel() * 3.0) ** 2
+
+    index = np.arange(nx * ny, dtype=np.int32).reshape(ny, nx)
+    quads = np.stack(
+        (index[:-1, :-1], index[:-1, 1:], index[1:, 1:], index[1:, :-1]),
+        axis=-1,
+    ).reshape(-1)
+
+    mesh = bpy.data.meshes.new(name)
+    mesh.vertices.add(len(co))
+    mesh.vertices.foreach_set("co", co.ravel())
+    mesh.loops.add(len(quads))
+    mesh.loops.foreach_set("vertex_index", quads)
+    mesh.polygons.add(len(quads) // 4)
+    mesh.polygons.foreach_set("loop_start", np.arange(0, len(quads), 4, dtype=np.int32))
+    mesh.update(calc_edges=True)
+    return mesh
+
+
+def create_sphere_mesh(name, verts):
+    """U 分割数が偶数の UV 球（X について対称になる）"""
+    v_segments = max(4, int(math.sqrt(verts / 2)))
+    u_segments = max(4, verts // v_segments)
+    u_segments += u_segments % 2
+
+    mesh = bpy.data.meshes.new(name)
+    bm = bmesh.new()
+    bmesh.ops.create_uvsphere(bm, u_segments=u_segments, v_segments=v_segments, radius=1.0, calc_uvs=True)
+    bm.to_mesh(mesh)
+    bm.free()
+    return mesh
+
+
+SHAPES = {
+    "grid": create_grid_mesh,
+    "sphere": create_sphere_mesh,
+}
+
+
+def create_object(
+    shape,
+    verts,
+    shape_keys=0,
+    vertex_groups=0,
+    uv_maps=1,
+    custom_normals=True,
+    uv_groups=0,
+    group_attr="Mio3QS_UVGroup",
+    seed=0,
+):
+    """計測対象のオブジェクトを生成してシーンに追加する
+
+    片側 (-X) にだけランダムな変形・ウェイトを与え、対称化で差分が出るようにする
+    """
+    rng = np.random.default_rng(seed)
+    name = "{}_{}".format(shape, verts)
+    mesh = SHAPES[shape](name, verts)
+    obj = bpy.data.objects.new(name, mesh)
+    bpy.context.scene.collection.objects.link(obj)
+
+    v_len = len(mesh.vertices)
+    co = np.empty(v_len * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+    co = co.reshape(-1, 3)
+    negative = co[:, 0] < 0
+
+    # UV マップ
+    uv = (co[:, :2] * 0.5 + 0.5).astype(np.float32)
+    loop_vert = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", loop_vert)
+    for i in range(uv_maps):
+        layer = mesh.uv_layers.new(name="UVMap{}".format(i) if i else "UVMap")
+        layer.data.foreach_set("uv", (uv[loop_vert] + 0.01 * i).ravel())
+
+    # シェイプキー
+    if shape_keys:
+        obj.shape_key_add(name="Basis", from_mix=False)
+        for i in range(shape_keys):
+            key_name = "Key{}{}".format(i, SIDE_SUFFIXES[i % 2]) if i % 3 == 0 else "Key{}".format(i)
+            kb = obj.shape_key_add(name=key_name, from_mix=False)
+            offset = rng.normal(0.0, 0.01, (v_len, 3)).astype(np.float32)
+            offset[~negative] = 0.0
+            kb.data.foreach_set("co", (co + offset).ravel())
+
+    # _L/_R の頂点グループ
+    for i in range(vertex_groups):
+        for suffix in SIDE_SUFFIXES:
+            vg = obj.vertex_groups.new(name="Group{}{}".format(i, suffix))
+            members = np.flatnonzero(negative & (rng.random(v_len) < 0.25)).tolist()
+            vg.add(members, float(rng.uniform(0.2, 1.0)), "REPLACE")
+
+    # カスタム法線
+    if custom_normals:
+        normals = co + np.array((0.0, 0.0, 1.0), dtype=np.float32)
+        normals /= np.linalg.norm(normals, axis=1, keepdims=True)
+        mesh.normals_split_custom_set_from_vertices(normals)
+
+    if uv_groups:
+        setup_uv_groups(obj, uv_groups, group_attr)
+
+    return obj
+
+
+def setup_uv_groups(obj, count, group_attr):
+    """面を Y 方向の帯で UV グループに割り当てる"""
+    mesh = obj.data
+    attr = mesh.attributes.get(group_attr)
+    if attr is None:
+        attr = mesh.attributes.new(name=group_attr, type="INT", domain="FACE")
+
+    uv_group = obj.mio3qs.uv_group
+    uv_group.items.clear()
+    uv_group.items.add().name = "Default"
+    for i in range(count):
+        item = uv_group.items.add()
+        item.name = "Group {}".format(i + 1)
+        item.uv_coord_u = 0.5 + 0.01 * i
+    uv_group.active_index = 1 if count else 0
+
+    centers = np.empty(len(mesh.polygons) * 3, dtype=np.float32)
+    mesh.polygons.foreach_get("center", centers)
+    y = centers.reshape(-1, 3)[:, 1]
+    bands = np.clip(((y + 1.0) * 0.5 * (count + 1)).astype(np.int32), 0, count)
+    attr.data.foreach_set("value", bands)
+
+
+def duplicate(obj):
+    """メッシュごと複製したオブジェクトを返す（計測ごとに同じ入力を使う）"""
+    copy = obj.copy()
+    copy.data = obj.data.copy()
+    bpy.context.scene.collection.objects.link(copy)
+    return copy
+
+
+def remove(obj):
+    mesh = obj.data
+    bpy.data.objects.remove(obj)
+    if mesh.users == 0:
+        bpy.data.meshes.remove(mesh)
@@ -0,0 +1,241 @@
+"""Mio3 Symmetry のヘッドレスベンチマーク
+
+blender --background --factory-startup --python benchmarks/run_blender.py -- [options]
+
+  --sizes 10000 100000 2000000   頂点数
+  --shapes grid sphere          メッシュ形状
+  --shape-keys 8                シェイプキー数
+  --vertex-groups 8             _L/_R の頂点グループのペア数
+  --uv-maps 2                   UVマップ数
+  --uv-groups 4                 UVグループ数
+  --combinations single|all     対称化オプションの組み合わせ（single: 既定・単独・全部 / all: 全組み合わせ）
+  --repeat 3                    各ケースの試行回数（中央値を採用）
+  --output results.json         結果の書き出し先（省略時は標準出力）
+  --baseline baseline.json      比較対象の結果
+  --tolerance 1.25              baseline の中央値に対する許容倍率
+  --thresholds thresholds.json  ケース名 → 最大秒数 の JSON
+
+いずれかのしきい値を超えた場合は終了コード 1 で終了する
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import bpy
+import addon_utils
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ADDON_DIR = os.path.dirname(BENCH_DIR)
+ADDON_NAME = os.path.basename(ADDON_DIR)
+
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.dirname(ADDON_DIR))
+
+import mesh_factory
+
+SYMMETRY_OPTIONS = (
+    "uvmap",
+    "uvmap_all",
+    "normal",
+    "facial",
+    "store_mirror_map",
+    "stream_shapekeys",
+    "keep_topology",
+)
+
+
+def parse_args():
+    argv = sys.argv[sys.argv.index("--") + 1 :] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(prog="run_blender.py")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 500000, 2000000])
+    parser.add_argument("--shapes", nargs="+", choices=sorted(mesh_factory.SHAPES), default=["grid", "sphere"])
+    parser.add_argument("--shape-keys", type=int, default=8)
+    parser.add_argument("--vertex-groups", type=int, default=8)
+    parser.add_argument("--uv-maps", type=int, default=2)
+    parser.add_argument("--uv-groups", type=int, default=4)
+    parser.add_argument("--combinations", choices=("single", "all"), default="single")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default="")
+    parser.add_argument("--baseline", default="")
+    parser.add_argument("--tolerance", type=float, default=1.25)
+    parser.add_argument("--thresholds", default="")
+    return parser.parse_args(argv)
+
+
+def option_sets(mode):
+    """対称化オプションの組み合わせを列挙する"""
+    if mode == "all":
+        for values in itertools.product((False, True), repeat=len(SYMMETRY_OPTIONS)):
+            yield dict(zip(SYMMETRY_OPTIONS, values))
+        return
+
+    yield {}
+    for name in SYMMETRY_OPTIONS:
+        yield {name: True}
+    yield {name: True for name in SYMMETRY_OPTIONS}
+
+
+def option_label(options):
+    enabled = [name for name, value in options.items() if value]
+    return "+".join(enabled) if enabled else "default"
+
+
+def profiler_module():
+    return sys.modules[ADDON_NAME + ".profiler"]
+
+
+def set_active(obj, mode="OBJECT"):
+    view_layer = bpy.context.view_layer
+    if bpy.context.object and bpy.context.object.mode != "OBJECT":
+        bpy.ops.object.mode_set(mode="OBJECT")
+    for o in view_layer.objects:
+        o.select_set(False)
+    view_layer.objects.active = obj
+    obj.select_set(True)
+    if mode != "OBJECT":
+        bpy.ops.object.mode_set(mode=mode)
+
+
+def measure(source, repeat, run, mode="OBJECT"):
+    """source の複製に対して run を repeat 回実行し、時間とステージの記録を返す"""
+    times = []
+    stages = None
+    for _ in range(repeat):
+        obj = mesh_factory.duplicate(source)
+        set_active(obj, mode)
+        profiler_module().last_record = None
+        start = time.perf_counter()
+        result = run(obj)
+        times.append(time.perf_counter() - start)
+        if result is not None and "FINISHED" not in result:
+            raise RuntimeError("operator returned {}".format(result))
+        record = profiler_module().last_record
+        if record is not None:
+            stages = record["stages"]
+        set_active(obj)
+        mesh_factory.remove(obj)
+    return times, stages
+
+
+def run_symmetry(options):
+    return lambda obj: bpy.ops.object.mio3_symmetry(direction="-X", **options)
+
+
+def run_normal_symmetrize(obj):
+    bpy.ops.mesh.select_all(action="SELECT")
+    return bpy.ops.mesh.mio3_normal_symmetrize(axis="POSITIVE_X")
+
+
+def run_uv_group(name, **kwargs):
+    def run(obj):
+        bpy.ops.mesh.select_all(action="SELECT")
+        return getattr(bpy.ops.object, name)(**kwargs)
+
+    return run
+
+
+def run_preview(obj):
+    preview = sys.modules[ADDON_NAME + ".op_symmetrize_preview"].UV_OT_mio3_symmetry_preview
+    preview.update_mesh(bpy.context)
+
+
+def cases(source, args):
+    """(ケース名, 実行関数, モード) を列挙する"""
+    for options in option_sets(args.combinations):
+        yield "object.mio3_symmetry/" + option_label(options), run_symmetry(options), "OBJECT"
+
+    if source.data.has_custom_normals:
+        yield "mesh.mio3_normal_symmetrize", run_normal_symmetrize, "EDIT"
+
+    if args.uv_groups:
+        yield "object.mio3qs_uv_group_assign", run_uv_group("mio3qs_uv_group_assign"), "EDIT"
+        yield "object.mio3qs_uv_group_unassign", run_uv_group("mio3qs_uv_group_unassign"), "EDIT"
+        yield "object.mio3qs_uv_group_move", run_uv_group("mio3qs_uv_group_move", direction="DOWN"), "EDIT"
+        yield "object.mio3qs_uv_group_remove", run_uv_group("mio3qs_uv_group_remove"), "EDIT"
+        yield "preview.update_mesh", run_preview, "EDIT"
+
+
+def check_regressions(results, args):
+    regressions = []
+    limits = {}
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            for entry in json.load(f)["results"]:
+                limits[entry["case"]] = entry["median"] * args.tolerance
+    if args.thresholds:
+        with open(args.thresholds, encoding="utf-8") as f:
+            for case, seconds in json.load(f).items():
+                limits[case] = min(limits.get(case, seconds), seconds)
+
+    for entry in results:
+        limit = limits.get(entry["case"])
+        if limit is not None and entry["median"] > limit:
+            regressions.append({"case": entry["case"], "median": entry["median"], "limit": limit})
+    return regressions
+
+
+def main():
+    args = parse_args()
+    addon_utils.enable(ADDON_NAME, default_set=True)
+    common = sys.modules[ADDON_NAME + ".common"]
+
+    results = []
+    for shape, size in itertools.product(args.shapes, args.sizes):
+        source = mesh_factory.create_object(
+            shape,
+            size,
+            shape_keys=args.shape_keys,
+            vertex_groups=args.vertex_groups,
+            uv_maps=args.uv_maps,
+            uv_groups=args.uv_groups,
+            group_attr=common.NAME_ATTR_GROUP,
+        )
+        mesh_info = {
+            "shape": shape,
+            "verts": len(source.data.vertices),
+            "faces": len(source.data.polygons),
+            "loops": len(source.data.loops),
+        }
+        for name, run, mode in cases(source, args):
+            case = "{}/{}/{}".format(name, shape, size)
+            times, stages = measure(source, args.repeat, run, mode)
+            entry = {
+                "case": case,
+                "mesh": mesh_info,
+                "times": times,
+                "median": statistics.median(times),
+                "min": min(times),
+            }
+            if stages is not None:
+                entry["stages"] = stages
+            results.append(entry)
+            print("{:<80} {:>10.4f} s".format(case, entry["median"]), file=sys.stderr)
+        mesh_factory.remove(source)
+
+    report = {
+        "blender": bpy.app.version_string,
+        "platform": platform.platform(),
+        "timestamp": time.time(),
+        "args": vars(args),
+        "results": results,
+        "regressions": check_regressions(results, args),
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+    for regression in report["regressions"]:
+        print("REGRESSION {case}: {median:.4f} s > {limit:.4f} s".format(**regression), file=sys.stderr)
+    sys.exit(1 if report["regressions"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,3 +8,5 @@ SUFFIX = [
     ("-l", "-r"),
 ]
 NAME_ATTR_GROUP = "Mio3QS_UVGroup"
+NAME_ATTR_MIRROR = "Mio3QS_MirrorIndex"
+NAME_PROP_MIRROR_HASH = "Mio3QS_MirrorHash"
@@ -0,0 +1,412 @@
+"""bpy に依存しない対称化の計算（NumPy の配列だけを扱う）
+
+パッケージ相対の import をしないため、Blender の外から単体で読み込める
+"""
+
+import itertools
+import numpy as np
+
+MIRROR_X = np.array((-1.0, 1.0, 1.0), dtype=np.float32)
+# プレビューで軸上とみなすUVの距離（従来のプレビューと同じ）
+PREVIEW_CENTER_THRESHOLD = 1e-4
+
+
+def _cell_keys(cells):
+    return (cells[:, 0] * 73856093) ^ (cells[:, 1] * 19349663) ^ (cells[:, 2] * 83492791)
+
+
+def find_nearest_indices(points, queries, threshold):
+    """queries の各点から距離 threshold 以内で最も近い points のインデックスを返す（なければ -1）"""
+    result = np.full(len(queries), -1, dtype=np.int64)
+    if not len(points) or not len(queries):
+        return result
+
+    points = np.asarray(points, dtype=np.float64)
+    queries = np.asarray(queries, dtype=np.float64)
+    cell_size = threshold * 2.0
+    max_dist = threshold * threshold
+
+    point_keys = _cell_keys(np.floor(points / cell_size).astype(np.int64))
+    order = np.argsort(point_keys, kind="stable")
+    sorted_keys = point_keys[order]
+    cell_start = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+    cell_keys = sorted_keys[cell_start]
+    cell_end = np.r_[cell_start[1:], len(sorted_keys)]
+
+    # セル幅は閾値の2倍なので、各軸で近い側の隣接セルだけ調べれば足りる
+    scaled = queries / cell_size
+    cells = np.floor(scaled).astype(np.int64)
+    near_side = np.where(scaled - cells < 0.5, -1, 1)
+
+    best_dist = np.full(len(queries), np.inf)
+    pos = np.empty(len(queries), dtype=np.int64)
+    for offset in itertools.product((0, 1), repeat=3):
+        keys = _cell_keys(cells + near_side * np.array(offset))
+        key_order = np.argsort(keys)
+        pos[key_order] = np.searchsorted(cell_keys, keys[key_order])
+        np.minimum(pos, len(cell_keys) - 1, out=pos)
+        rows = np.flatnonzero(cell_keys[pos] == keys)
+        start = cell_start[pos[rows]]
+        end = cell_end[pos[rows]]
+        while len(rows):
+            candidates = order[start]
+            dist = ((points[candidates] - queries[rows]) ** 2).sum(axis=1)
+            closer = (dist < best_dist[rows]) & (dist <= max_dist)
+            best_dist[rows[closer]] = dist[closer]
+            result[rows[closer]] = candidates[closer]
+            start += 1
+            remain = start < end
+            rows, start, end = rows[remain], start[remain], end[remain]
+
+    return result
+
+
+def find_x_mirror_indices(co, threshold=1e-4):
+    """全頂点のXミラー側の頂点インデックスを返す（対応がなければ -1）"""
+    result = np.full(len(co), -1, dtype=np.int64)
+    positive = np.flatnonzero(co[:, 0] >= 0.0)
+    negative = np.flatnonzero(co[:, 0] <= 0.0)
+    mirrored = co[negative] * np.array((-1.0, 1.0, 1.0), dtype=co.dtype)
+
+    matched = find_nearest_indices(co[positive], mirrored, threshold)
+    found = np.flatnonzero(matched >= 0)
+    pairs_neg = negative[found]
+    pairs_pos = positive[matched[found]]
+
+    # 同じ +X 頂点に複数の -X 頂点が対応したら最も近いものだけを残す
+    dist = ((co[pairs_pos] - mirrored[found]) ** 2).sum(axis=1)
+    order = np.lexsort((pairs_neg, dist, pairs_pos))
+    pairs_neg, pairs_pos = pairs_neg[order], pairs_pos[order]
+    first = np.r_[True, pairs_pos[1:] != pairs_pos[:-1]]
+    pairs_neg, pairs_pos = pairs_neg[first], pairs_pos[first]
+
+    result[pairs_pos] = pairs_neg
+    result[pairs_neg] = pairs_pos
+    # 中心付近の頂点は両側に含まれるため、往復で戻らない対応を外して1対1にする
+    valid = np.flatnonzero(result >= 0)
+    broken = valid[result[result[valid]] != valid]
+    result[broken] = -1
+    return result
+
+
+def build_mirror_maps(co, loop_vert, loop_start, loop_total, loop_face, threshold=1e-4, vert_map=None):
+    """頂点・面・ループのXミラー対応表を返す（対応がなければ -1）"""
+    if vert_map is None:
+        vert_map = find_x_mirror_indices(co, threshold)
+    face_map = find_mirror_faces(loop_vert, loop_start, loop_total, vert_map)
+    mirror_verts = vert_map[loop_vert]
+    loop_map = find_face_loops(loop_vert, loop_face, len(co), face_map[loop_face], mirror_verts)
+
+    # 頂点集合が対称でない面は、鏡像頂点の面から中心が最も近いものを使う
+    if len(rows := np.flatnonzero((loop_map < 0) & (mirror_verts >= 0))):
+        centers = np.add.reduceat(co[loop_vert], loop_start) / loop_total[:, None]
+        mirror_centers = centers[loop_face[rows]] * np.array((-1.0, 1.0, 1.0), dtype=centers.dtype)
+        loop_map[rows] = find_nearest_face_loops(loop_vert, loop_face, centers, mirror_verts[rows], mirror_centers)
+
+    return vert_map, face_map, loop_map
+
+
+def is_complete_mirror_map(vert_map, edges):
+    """全頂点に対応があり、辺が辺に写る対応表か"""
+    v_len = len(vert_map)
+    if not v_len or vert_map.min() < 0 or vert_map.max() >= v_len:
+        return False
+    if (vert_map[vert_map] != np.arange(v_len)).any():
+        return False
+    # 恒等写像のように自分以外と対になる頂点がない対応は使えない
+    if (vert_map == np.arange(v_len)).all():
+        return False
+    if not len(edges):
+        return True
+    edges = np.sort(edges, axis=1).astype(np.int64)
+    mirror_edges = np.sort(vert_map[edges], axis=1)
+    edge_keys = edges[:, 0] * v_len + edges[:, 1]
+    mirror_keys = mirror_edges[:, 0] * v_len + mirror_edges[:, 1]
+    return bool(np.isin(mirror_keys, edge_keys).all())
+
+
+def mirror_map_fits(co, vert_map, tolerance=0.01):
+    """対応する頂点同士がおおよそX反転の位置にあるか（|x + x_相手| の中央値をバウンディングボックスと比べる）"""
+    rows = np.flatnonzero(vert_map >= 0)
+    if not len(rows):
+        return False
+    size = float(np.ptp(co, axis=0).max())
+    error = np.abs(co[rows, 0] + co[vert_map[rows], 0])
+    return float(np.median(error)) <= tolerance * size
+
+
+def find_nearest_face_loops(loop_vert, loop_face, face_centers, query_vert, query_centers):
+    """query_vert の頂点のループのうち、面の中心が query_centers に最も近いループを返す（なければ -1）"""
+    result = np.full(len(query_vert), -1, dtype=np.int64)
+    order = np.argsort(loop_vert, kind="stable")
+    sorted_vert = loop_vert[order]
+    start = np.searchsorted(sorted_vert, query_vert, "left")
+    end = np.searchsorted(sorted_vert, query_vert, "right")
+    rows = np.flatnonzero((query_vert >= 0) & (end > start))
+
+    best_dist = np.full(len(query_vert), np.inf)
+    k = 0
+    while len(rows):
+        candidates = order[start[rows] + k]
+        dist = ((face_centers[loop_face[candidates]] - query_centers[rows]) ** 2).sum(axis=1)
+        closer = dist < best_dist[rows]
+        best_dist[rows[closer]] = dist[closer]
+        result[rows[closer]] = candidates[closer]
+        k += 1
+        rows = rows[start[rows] + k < end[rows]]
+
+    return result
+
+
+def _vertex_hashes(v_len):
+    h = np.arange(1, v_len + 1, dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+    h ^= h >> np.uint64(31)
+    h *= np.uint64(0xBF58476D1CE4E5B9)
+    h ^= h >> np.uint64(29)
+    return h
+
+
+def find_mirror_faces(loop_vert, loop_start, loop_total, vert_map):
+    """頂点の対応表から、頂点集合が一致する鏡像側の面を返す（なければ -1）"""
+    p_len = len(loop_start)
+    result = np.full(p_len, -1, dtype=np.int64)
+    if not p_len:
+        return result
+
+    hashes = _vertex_hashes(len(vert_map))
+    face_keys = np.add.reduceat(hashes[loop_vert], loop_start)
+
+    mirror_vert = vert_map[loop_vert]
+    has_mirror = np.logical_and.reduceat(mirror_vert >= 0, loop_start)
+    mirror_keys = np.add.reduceat(hashes[np.maximum(mirror_vert, 0)], loop_start)
+
+    order = np.argsort(face_keys, kind="stable")
+    sorted_keys = face_keys[order]
+    pos = np.minimum(np.searchsorted(sorted_keys, mirror_keys), p_len - 1)
+    matched = order[pos]
+    found = has_mirror & (sorted_keys[pos] == mirror_keys) & (loop_total[matched] == loop_total)
+    result[found] = matched[found]
+    return result
+
+
+def find_face_loops(loop_vert, loop_face, v_len, faces, verts):
+    """(面, 頂点) の組に対応するループのインデックスを返す（なければ -1）"""
+    result = np.full(len(faces), -1, dtype=np.int64)
+    loop_keys = loop_face.astype(np.int64) * v_len + loop_vert
+    order = np.argsort(loop_keys, kind="stable")
+    sorted_keys = loop_keys[order]
+    rows = np.flatnonzero((faces >= 0) & (verts >= 0))
+    if not len(rows) or not len(sorted_keys):
+        return result
+
+    keys = faces[rows].astype(np.int64) * v_len + verts[rows]
+    pos = np.minimum(np.searchsorted(sorted_keys, keys), len(sorted_keys) - 1)
+    found = sorted_keys[pos] == keys
+    result[rows[found]] = order[pos[found]]
+    return result
+
+
+def reflect_x(dst, dst_index, src, src_index):
+    """src[src_index] を X について反転して dst[dst_index] に書き込む"""
+    dst[dst_index] = src[src_index]
+    dst[dst_index, 0] *= -1.0
+    return dst
+
+
+def recovery_sides(co, vert_map, positive_source=True, mask=None):
+    """対応表から、上書きする頂点・元の頂点・中心の頂点を返す
+
+    対応のない頂点 (-1) は対象外。mask を渡すと、どちらかの頂点が mask に含まれる組だけを対象にする
+    """
+    index = np.arange(len(co))
+    paired = vert_map >= 0
+    partner = np.where(paired, vert_map, index)
+    x, partner_x = co[:, 0], co[partner, 0]
+    is_target = x < partner_x if positive_source else x > partner_x
+    is_target |= (x == partner_x) & (index > partner)
+    is_target &= paired
+    is_center = vert_map == index
+    if mask is not None:
+        is_target &= mask | mask[partner]
+        is_center &= mask
+    targets = np.flatnonzero(is_target)
+    return is_target, targets, vert_map[targets], np.flatnonzero(is_center)
+
+
+def mirror_positions(coords, targets, sources, centers):
+    """元の頂点の座標を反転して上書きし、中心の頂点を X=0 に揃える"""
+    reflect_x(coords, targets, coords, sources)
+    coords[centers, 0] = 0.0
+    return coords
+
+
+def recovery_loops(is_target, centers, loop_vert, loop_start, loop_face, loop_map):
+    """UVを上書きするループ（上書きする頂点か中心の頂点のループで、対応のあるもの）
+
+    X=0 をまたぐ面は自身に写るため、元の側のループまで書き換えないよう頂点で絞る
+    """
+    writable = is_target.copy()
+    writable[centers] = True
+    face_on_target_side = np.logical_or.reduceat(is_target[loop_vert], loop_start)
+    return np.flatnonzero(face_on_target_side[loop_face] & writable[loop_vert] & (loop_map >= 0))
+
+
+def mirror_uv(uv, pivot_u, offset_v=None, threshold=1e-5):
+    """UVを pivot_u を軸に左右反転し、offset_v があればVをずらした配列を返す（軸から threshold 未満は軸に揃える）"""
+    uv = uv.copy()
+    dx = uv[:, 0] - pivot_u
+    uv[:, 0] = np.where(np.abs(dx) < threshold, pivot_u, pivot_u - dx)
+    if offset_v is not None:
+        uv[:, 1] += offset_v
+    return uv
+
+
+def pair_names(names, mirror_name):
+    """mirror_name で左右反転した名前と組にして、各名前の相手のインデックスを返す（なければ自身）"""
+    partner = np.arange(len(names), dtype=np.int32)
+    name_to_index = {}
+    for i, name in enumerate(names):
+        name_to_index.setdefault(name, i)
+
+    processed = set()
+    for i, name in enumerate(names):
+        if name in processed:
+            continue
+        processed.add(name)
+        opposite_name = mirror_name(name)
+        if not opposite_name or opposite_name == name:
+            continue
+        if (j := name_to_index.get(opposite_name)) is None:
+            continue
+        partner[i] = j
+        partner[j] = i
+        processed.add(opposite_name)
+    return partner
+
+
+def group_permutation(partner, group_ids):
+    """頂点グループのインデックスを左右の相手に置き換える表を返す"""
+    size = max(len(partner), int(group_ids.max()) + 1) if len(group_ids) else len(partner)
+    permutation = np.arange(size, dtype=np.int32)
+    permutation[: len(partner)] = partner
+    return permutation
+
+
+def swap_weight_groups(partner, group_ids):
+    """ウェイトのグループを左右の相手に入れ替えた配列を返す"""
+    return group_permutation(partner, group_ids)[group_ids]
+
+
+def weight_swap_edits(offsets, group_ids, swapped_ids, weights):
+    """入れ替えたウェイトを書き戻すための差分を返す
+
+    グループが変わったエントリだけを対象にする。相手のグループを持たない頂点では
+    元のグループを削除し、入れ替えでウェイトが 0 になったグループも削除する
+    戻り値: (設定する (行, グループ, ウェイト), 削除する (行, グループ))
+    """
+    rows = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+    changed = np.flatnonzero(swapped_ids != group_ids)
+    rows, old_ids, new_ids, values = rows[changed], group_ids[changed], swapped_ids[changed], weights[changed]
+
+    size = int(max(old_ids.max(), new_ids.max())) + 1 if len(changed) else 1
+    has_partner = np.isin(rows * size + new_ids, rows * size + old_ids)
+    drop_old = ~has_partner
+    drop_new = has_partner & (values == 0)
+    sets = (rows, new_ids, values)
+    deletes = (
+        np.concatenate((rows[drop_old], rows[drop_new])),
+        np.concatenate((old_ids[drop_old], new_ids[drop_new])),
+    )
+    return sets, deletes
+
+
+def unsymmetrize_key(source_coords, target_coords, basis_masked, mask_indices):
+    """マスクした頂点の変形を target に移し、source のマスク部分を basis（basis_masked）に戻す"""
+    target_coords[mask_indices] = source_coords[mask_indices]
+    source_coords[mask_indices] = basis_masked
+
+
+def remap_face_groups(face_group, lut):
+    """面のグループ番号を lut[old] で付け替える（lut の範囲外の番号はそのまま）"""
+    valid = (face_group >= 0) & (face_group < len(lut))
+    return np.where(valid, lut[np.where(valid, face_group, 0)], face_group).astype(face_group.dtype)
+
+
+def faces_all_selected(loop_select, loop_start, loop_total):
+    """すべてのループが選択されている面のマスクを返す"""
+    selected = np.zeros(len(loop_start), dtype=bool)
+    faces = np.flatnonzero(loop_total > 0)
+    if len(faces):
+        selected[faces] = np.logical_and.reduceat(loop_select, loop_start[faces])
+    return selected
+
+
+def fan_triangles(loop_start, loop_total, faces=None):
+    """面のループ範囲から扇形に分割した三角形のループインデックス (T, 3) を返す"""
+    if faces is not None:
+        loop_start, loop_total = loop_start[faces], loop_total[faces]
+    counts = np.maximum(loop_total - 2, 0)
+    starts = np.repeat(loop_start, counts)
+    # 各面の中での三角形の番号 (1, 2, ...)
+    offsets = np.arange(len(starts)) - np.repeat(np.cumsum(counts) - counts, counts) + 1
+    tris = np.empty((len(starts), 3), dtype=np.uint32)
+    tris[:, 0] = starts
+    tris[:, 1] = starts + offsets
+    tris[:, 2] = starts + offsets + 1
+    return tris
+
+
+def face_edges(loop_start, loop_total, faces=None):
+    """面の辺をループインデックスの組 (E, 2) で返す"""
+    if faces is not None:
+        loop_start, loop_total = loop_start[faces], loop_total[faces]
+    loops = np.repeat(loop_start - np.cumsum(loop_total) + loop_total, loop_total) + np.arange(loop_total.sum())
+    next_loops = loops + 1
+    last = np.cumsum(loop_total) - 1
+    next_loops[last] = loop_start
+    return np.stack((loops, next_loops), axis=1).astype(np.uint32)
+
+
+def partition_preview_groups(uv, loop_start, loop_total, face_group, group_count):
+    """UVグループのプレビュー用に、面をグループごとに分けて描画用のインデックスを作る
+
+    uv はループごとのUV (L, 2)、face_group は面ごとのグループ番号（なければ None）
+    戻り値: (グループごとの (ループ, 三角形 (T, 3), 辺 (E, 2)) のリスト, グループごとのVの平均)
+    三角形と辺はグループのループ配列の中でのインデックス
+    """
+    p_len = len(loop_start)
+    if face_group is None:
+        face_group = np.zeros(p_len, dtype=np.int32)
+    faces = np.flatnonzero((face_group >= 0) & (face_group < group_count))
+    faces = faces[np.argsort(face_group[faces], kind="stable")]
+    face_counts = np.bincount(face_group[faces], minlength=group_count)
+    face_bounds = np.concatenate(([0], np.cumsum(face_counts)))
+
+    totals = loop_total[faces]
+    ends = np.cumsum(totals)
+    starts = ends - totals
+    loops = np.repeat(loop_start[faces] - starts, totals) + np.arange(ends[-1] if len(ends) else 0)
+    loop_bounds = np.concatenate(([0], ends))[face_bounds]
+
+    loop_group = np.repeat(face_group[faces], totals)
+    loop_counts = np.bincount(loop_group, minlength=group_count)
+    sum_v = np.bincount(loop_group, weights=uv[loops, 1], minlength=group_count)
+    mean_v = np.divide(sum_v, loop_counts, out=np.zeros(group_count), where=loop_counts > 0)
+
+    groups = []
+    for g in range(group_count):
+        f0, f1 = face_bounds[g], face_bounds[g + 1]
+        local_start = starts[f0:f1] - loop_bounds[g]
+        groups.append(
+            (
+                loops[loop_bounds[g] : loop_bounds[g + 1]],
+                fan_triangles(local_start, totals[f0:f1]),
+                face_edges(local_start, totals[f0:f1]),
+            )
+        )
+    return groups, mean_v
+
+
+def mirror_preview_group(uv, loops, pivot_u, offset_v):
+    """グループのループのUVを反転したプレビュー用の座標 (float32) を返す"""
+    return mirror_uv(uv[loops], pivot_u, offset_v if offset_v else None, PREVIEW_CENTER_THRESHOLD).astype(np.float32)
@@ -0,0 +1,214 @@
+import uuid
+import zlib
+import bpy
+import numpy as np
+from collections import OrderedDict
+from .common import NAME_ATTR_MIRROR, NAME_PROP_MIRROR_HASH
+from .core import build_mirror_maps, find_x_mirror_indices
+
+MAX_CACHE_BYTES = 512 * 1024 * 1024
+BMESH_ELEM_BYTES = 96
+
+_entries = OrderedDict()
+_total_bytes = 0
+_redo_entries = OrderedDict()
+_redo_token = ""
+_redo_undone = False
+
+
+def mesh_fingerprint(*arrays):
+    """配列の長さとCRCからメッシュの簡易フィンガープリントを作る"""
+    return tuple((len(a), zlib.crc32(a)) for a in arrays)
+
+
+def _nbytes(value):
+    return sum(a.nbytes for a in value)
+
+
+def lookup(mesh, kind, fingerprint):
+    key = (mesh.session_uid, kind)
+    entry = _entries.get(key)
+    if entry is None or entry[0] != fingerprint:
+        return None
+    _entries.move_to_end(key)
+    return entry[1]
+
+
+def store(mesh, kind, fingerprint, value):
+    """配列のタプルを保存し、上限を超えたら古いものから破棄する"""
+    global _total_bytes
+    key = (mesh.session_uid, kind)
+    if (old := _entries.pop(key, None)) is not None:
+        _total_bytes -= _nbytes(old[1])
+
+    size = _nbytes(value)
+    if size > MAX_CACHE_BYTES:
+        return
+    for a in value:
+        a.flags.writeable = False
+    _entries[key] = (fingerprint, value)
+    _total_bytes += size
+    _evict()
+
+
+def _evict():
+    """上限を超えた分を古い配列から、それでも足りなければリドゥ用のBMeshから破棄する"""
+    global _total_bytes
+    while _total_bytes > MAX_CACHE_BYTES and _entries:
+        _, (_, evicted) = _entries.popitem(last=False)
+        _total_bytes -= _nbytes(evicted)
+    while _total_bytes > MAX_CACHE_BYTES and _redo_entries:
+        _, (_, bm, size) = _redo_entries.popitem(last=False)
+        bm.free()
+        _total_bytes -= size
+
+
+def clear():
+    global _total_bytes
+    _entries.clear()
+    _total_bytes = sum(entry[2] for entry in _redo_entries.values())
+
+
+def begin_redo():
+    """invoke ごとに新しいリドゥのトークンを発行し、前の結果を破棄する"""
+    global _redo_token
+    clear_redo()
+    _redo_token = uuid.uuid4().hex
+    return _redo_token
+
+
+def check_redo(token):
+    """同じ invoke から始まったリドゥ（直前にアンドゥされた再実行）か確かめ、違えば結果を破棄する"""
+    global _redo_undone
+    is_redo = bool(token) and token == _redo_token and _redo_undone
+    _redo_undone = False
+    if not is_redo:
+        clear_redo()
+    return is_redo
+
+
+def lookup_redo(mesh, key):
+    entry = _redo_entries.get(mesh.session_uid)
+    if entry is None or entry[0] != key:
+        return None
+    _redo_entries.move_to_end(mesh.session_uid)
+    return entry[1]
+
+
+def store_redo(mesh, key, bm):
+    """リドゥ用に対称化した直後のBMeshを保持する（置き換えたものは解放する）
+
+    配列のキャッシュと同じ容量の上限に含める。大きさは to_mesh 後のメッシュの要素数から見積もる
+    """
+    global _total_bytes
+    _drop_redo(mesh.session_uid)
+    elems = len(mesh.vertices) + len(mesh.edges) + len(mesh.loops) + len(mesh.polygons)
+    size = elems * BMESH_ELEM_BYTES + len(mesh.vertices) * 12 * len(bm.verts.layers.shape)
+    if size > MAX_CACHE_BYTES:
+        bm.free()
+        return
+    _redo_entries[mesh.session_uid] = (key, bm, size)
+    _total_bytes += size
+    _evict()
+
+
+def _drop_redo(uid):
+    global _total_bytes
+    if (old := _redo_entries.pop(uid, None)) is not None:
+        old[1].free()
+        _total_bytes -= old[2]
+
+
+def clear_redo():
+    for uid in list(_redo_entries):
+        _drop_redo(uid)
+
+
+def position_hash(co, matrix=None):
+    """座標のハッシュ（ワールド空間で対応を求めた場合はその行列も含め、ローカルの対応と区別する）"""
+    digest = "{}:{:08x}".format(len(co), zlib.crc32(co))
+    if matrix is not None:
+        digest += ":{:08x}".format(zlib.crc32(np.array(matrix, dtype=np.float32)))
+    return digest
+
+
+def load_mirror_attribute(mesh, co, check_positions=True):
+    """メッシュに保存されたミラー対応を返す（頂点数か座標が変わっていれば None）"""
+    attr = mesh.attributes.get(NAME_ATTR_MIRROR)
+    if attr is None or attr.domain != "POINT" or attr.data_type != "INT":
+        return None
+    if check_positions and mesh.get(NAME_PROP_MIRROR_HASH) != position_hash(co):
+        return None
+    vert_map = np.empty(len(co), dtype=np.int32)
+    attr.data.foreach_get("value", vert_map)
+    if len(vert_map) and (vert_map.max() >= len(co) or vert_map.min() < -1):
+        return None
+    return vert_map.astype(np.int64)
+
+
+def store_mirror_attribute(mesh, co, vert_map, matrix=None):
+    attr = mesh.attributes.get(NAME_ATTR_MIRROR)
+    if attr is not None and (attr.domain != "POINT" or attr.data_type != "INT"):
+        mesh.attributes.remove(attr)
+        attr = None
+    if attr is None:
+        attr = mesh.attributes.new(name=NAME_ATTR_MIRROR, type="INT", domain="POINT")
+    attr.data.foreach_set("value", vert_map.astype(np.int32))
+    mesh[NAME_PROP_MIRROR_HASH] = position_hash(co, matrix)
+
+
+def get_vertex_mirror_map(mesh, co, threshold=1e-4, store_attribute=False):
+    """頂点のミラー対応をキャッシュ・メッシュ属性から取得、なければ作成する"""
+    fingerprint = mesh_fingerprint(co)
+    kind = ("vertex_map", threshold)
+    if (cached := lookup(mesh, kind, fingerprint)) is not None:
+        vert_map = cached[0]
+    else:
+        if (vert_map := load_mirror_attribute(mesh, co)) is None:
+            vert_map = find_x_mirror_indices(co, threshold)
+        store(mesh, kind, fingerprint, (vert_map,))
+
+    if store_attribute and load_mirror_attribute(mesh, co) is None:
+        store_mirror_attribute(mesh, co, vert_map)
+    return vert_map
+
+
+def get_mirror_maps(mesh, co, loop_vert, loop_start, loop_total, loop_face, threshold=1e-4, vert_map=None):
+    """頂点・面・ループのミラー対応表をキャッシュから取得、なければ作成する（vert_map を渡せばそれを使う）"""
+    if vert_map is None:
+        fingerprint = mesh_fingerprint(co, loop_vert, loop_start)
+    else:
+        fingerprint = mesh_fingerprint(co, loop_vert, loop_start, vert_map)
+    kind = ("mirror_maps", threshold)
+    if (maps := lookup(mesh, kind, fingerprint)) is not None:
+        return maps
+    if vert_map is None:
+        vert_map = get_vertex_mirror_map(mesh, co, threshold)
+    maps = build_mirror_maps(co, loop_vert, loop_start, loop_total, loop_face, threshold, vert_map)
+    store(mesh, kind, fingerprint, maps)
+    return maps
+
+
+@bpy.app.handlers.persistent
+def load_handler(dummy):
+    clear_redo()
+    clear()
+
+
+@bpy.app.handlers.persistent
+def undo_handler(scene, *args):
+    # リドゥは直前の実行をアンドゥしてから execute を呼ぶ
+    global _redo_undone
+    _redo_undone = True
+
+
+def register():
+    bpy.app.handlers.load_post.append(load_handler)
+    bpy.app.handlers.undo_post.append(undo_handler)
+
+
+def unregister():
+    bpy.app.handlers.undo_post.remove(undo_handler)
+    bpy.app.handlers.load_post.remove(load_handler)
+    clear_redo()
+    clear()
@@ -1,8 +1,10 @@
 import bpy
-import bmesh
-from mathutils import Vector, kdtree
+import numpy as np
 from bpy.props import EnumProperty
-from .utils import Mio3SYMOperator, find_x_mirror_verts
+from .utils import Mio3SYMOperator, get_vertex_coords, get_loop_topology, get_corner_normals
+from .mirror_cache import get_mirror_maps
+from .core import reflect_x
+from .profiler import draw_record
 
 
 class MESH_OT_mio3_normal_symmetrize(Mio3SYMOperator):
@@ -26,73 +28,61 @@ class MESH_OT_mio3_normal_symmetrize(Mio3SYMOperator):
         return obj is not None and obj.mode == "EDIT"
 
     def execute(self, context):
-        self.start_time()
         obj = context.active_object
 
         if not obj.data.has_custom_normals:
             self.report({"WARNING"}, "No custom normals")
             return {"CANCELLED"}
 
-        bpy.ops.object.mode_set(mode="OBJECT")
-
-        bm = bmesh.new()
-        bm.from_mesh(obj.data)
-        bm.verts.ensure_lookup_table()
-
-        kd = kdtree.KDTree(len(bm.verts))
-        for i, v in enumerate(bm.verts):
-            kd.insert(v.co, i)
-        kd.balance()
-
-        normals = [list(l.normal) for l in obj.data.loops]
+        self.start_time()
+        with self.profiler:
+            self.symmetrize_normals(obj)
+            self.print_time()
+        return {"FINISHED"}
 
-        get_mirror_point = lambda co: Vector((-co.x, co.y, co.z))
-        get_mirror_normal = lambda n: [-n[0], n[1], n[2]]
+    def symmetrize_normals(self, obj):
+        profiler = self.profiler
+        mesh = obj.data
 
-        selected_verts = {v for v in bm.verts if v.select}
-        selected_verts.update(find_x_mirror_verts(bm, selected_verts))
+        with profiler.stage("Mode Switch"):
+            bpy.ops.object.mode_set(mode="OBJECT")
 
-        if self.axis == "POSITIVE_X":
-            is_source = lambda x: x > self._center_threshold
-        else:
-            is_source = lambda x: x < -self._center_threshold
+        with profiler.stage("Mirror Map", verts=len(mesh.vertices), loops=len(mesh.loops)):
+            co = get_vertex_coords(mesh)
+            loop_vert, loop_start, loop_total, loop_face = get_loop_topology(mesh)
+            v_len = len(co)
 
-        for v in selected_verts:
-            if not is_source(v.co.x):
-                continue
+            vert_map, _, loop_map = get_mirror_maps(mesh, co, loop_vert, loop_start, loop_total, loop_face, self._threshold)
+            has_mirror = vert_map >= 0
 
-            mirror_co = get_mirror_point(v.co)
-            _, idx, dist = kd.find(mirror_co)
-            if dist > self._threshold:
-                continue
-            mirror_v = bm.verts[idx]
+        with profiler.stage("Normals") as counts:
+            selected = np.zeros(v_len, dtype=bool)
+            mesh.vertices.foreach_get("select", selected)
+            selected[vert_map[selected & has_mirror]] = True
 
-            for face in v.link_faces:
-                mirror_center = get_mirror_point(face.calc_center_median())
-                if not (target_face := self.find_mirror_face(mirror_v.link_faces, mirror_center)):
-                    continue
+            if self.axis == "POSITIVE_X":
+                is_source = co[:, 0] > self._center_threshold
+            else:
+                is_source = co[:, 0] < -self._center_threshold
 
-                target_loops = {l.vert: l for l in target_face.loops}
-                for loop in face.loops:
-                    if loop.vert == v and mirror_v in target_loops:
-                        sym_loop = target_loops[mirror_v]
-                        normals[sym_loop.index] = get_mirror_normal(normals[loop.index])
+            source_loops = np.flatnonzero((selected & is_source & has_mirror)[loop_vert])
+            target_loops = loop_map[source_loops]
 
-        bm.free()
-        obj.data.normals_split_custom_set([tuple(n) for n in normals])
-        bpy.ops.object.mode_set(mode="EDIT")
-        self.print_time()
-        return {"FINISHED"}
+            found = target_loops >= 0
+            normals = get_corner_normals(mesh)
+            reflect_x(normals, target_loops[found], normals, source_loops[found])
+            mesh.normals_split_custom_set(normals)
+            counts["loops"] = int(found.sum())
 
-    @staticmethod
-    def find_mirror_face(mirror_faces, mirror_center):
-        return min(mirror_faces, key=lambda f: (mirror_center - f.calc_center_median()).length_squared)
+        with profiler.stage("Mode Switch"):
+            bpy.ops.object.mode_set(mode="EDIT")
 
     def draw(self, context):
         layout = self.layout
         layout.use_property_split = True
         layout.use_property_decorate = False
         layout.row().prop(self, "axis", text="Axis", expand=True)
+        draw_record(layout, self.bl_idname)
 
 
 def menu(self, context):
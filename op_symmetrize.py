@@ -1,17 +1,139 @@
 import bpy
 import bmesh
-import time
+import tempfile
+import zlib
 import numpy as np
+from mathutils import Matrix
 from bpy.types import Operator
-from bpy.props import EnumProperty, BoolProperty
+from bpy.props import EnumProperty, BoolProperty, StringProperty
+from . import mirror_cache
 from .common import NAME_ATTR_GROUP
+from .utils import (
+    read_deform_weights,
+    write_deform_weights,
+    get_vertex_coords,
+    get_loop_topology,
+    get_face_centers,
+    get_corner_normals,
+    get_face_groups,
+    get_uv_group_table,
+    is_local,
+    create_profiler,
+    finish_profiler,
+)
+from .core import (
+    MIRROR_X,
+    find_nearest_indices,
+    find_nearest_face_loops,
+    is_complete_mirror_map,
+    mirror_map_fits,
+    recovery_sides,
+    recovery_loops,
+    mirror_positions,
+    reflect_x,
+    mirror_uv,
+    pair_names,
+    swap_weight_groups,
+    unsymmetrize_key,
+)
+from .profiler import draw_record
 from .utils_mirror import parse_side_name, get_mirror_name
 
-TMP_VG_NAME = "Mio3qsTempVg"
-TMP_DATA_TRANSFER_NAME = "Mio3qsTempDataTransfer"
+SHAPEKEY_BATCH_SIZE = 32
+SHAPEKEY_SPILL_BYTES = 256 * 1024 * 1024
 
 
-class OBJECT_OT_mio3_symmetry(Operator):
+class Mio3SymmetryOperator:
+    """オブジェクトモードと編集モードの対称化で共通の処理"""
+
+    profiler = None
+    _name_pairs = {}
+    _replace_name_map = {
+        "ウィンク": "MMD_Wink_R",
+        "ウィンク右": "MMD_Wink_L",
+        "ウィンク２": "MMD_Wink2_R",
+        "ｳｨﾝｸ２右": "MMD_Wink2_L",
+    }
+
+    def remove_mirror_modifiers(self, obj):
+        if not self.remove_mirror_mod:
+            return
+        with self.profiler.stage("Remove Mirror Modifier", modifiers=len(obj.modifiers)):
+            for mod in obj.modifiers:
+                if mod.type == "MIRROR":
+                    obj.modifiers.remove(mod)
+
+    # グローバル
+    def get_world_matrix(self, obj):
+        """グローバルで対称化するときのワールド行列（変換が不要なら None）"""
+        if self.orient_type != "GLOBAL":
+            return None
+        matrix = obj.matrix_world.copy()
+        return None if matrix == Matrix.Identity(4) else matrix
+
+    def check_world_matrix(self, obj, matrix):
+        """逆行列で元に戻せない行列なら警告する（inverted_safe は特異行列でも値を返すため確かめる）"""
+        product = matrix.inverted_safe() @ matrix
+        if all(abs(product[i][j] - (i == j)) < 1e-5 for i in range(4) for j in range(4)):
+            return True
+        self.report({"WARNING"}, f"{obj.name}: world matrix is not invertible, skipped Global symmetrize")  # fmt:skip
+        return False
+
+    # UV
+    def get_uv_layers(self, mesh):
+        if self.uvmap_all:
+            return list(mesh.uv_layers)
+        return [mesh.uv_layers.active] if mesh.uv_layers.active else []
+
+    # 頂点ウェイト
+    def symm_vgroups(self, obj, bm):
+        deform_layer = bm.verts.layers.deform.verify()
+        partner = self.symmetric_group_mapping(obj)
+        swap_ids = set(np.flatnonzero(partner != np.arange(len(partner))).tolist())
+        if not swap_ids:
+            return
+
+        select_condition = lambda x: x <= 0 if self.direction == "+X" else x >= 0
+        dverts = []
+        for v in bm.verts:
+            if not v.select or not select_condition(v.co.x):
+                continue
+            weight_dict = v[deform_layer]
+            if not swap_ids.isdisjoint(weight_dict.keys()):
+                dverts.append(weight_dict)
+
+        if not dverts:
+            return
+
+        offsets, group_ids, weights = read_deform_weights(dverts)
+        write_deform_weights(dverts, offsets, group_ids, swap_weight_groups(partner, group_ids), weights)
+
+    def symmetric_group_mapping(self, obj):
+        return self.get_name_pairs([vg.name for vg in obj.vertex_groups])
+
+    def get_name_pairs(self, names):
+        """同じ名前の並びの組み合わせは、バッチ内のオブジェクト間で使い回す"""
+        key = tuple(names)
+        if (partner := self._name_pairs.get(key)) is None:
+            partner = self._name_pairs[key] = pair_names(names, get_mirror_name)
+        return partner
+
+    def get_facial_pairs(self, names):
+        """非対称化する表情シェイプキーの (上書きする側, 元の側) のインデックスの組
+
+        MMDの名前はキーを名前変更せず、読み替えた名前で組にする
+        """
+        names = [self._replace_name_map.get(name, name) for name in names]
+        partner = self.get_name_pairs(names)
+        target_side_kind = "right" if self.direction == "+X" else "left"
+        return [
+            (i, int(partner[i]))
+            for i, name in enumerate(names)
+            if partner[i] != i and parse_side_name(name)["side_kind"] == target_side_kind
+        ]
+
+
+class OBJECT_OT_mio3_symmetry(Mio3SymmetryOperator, Operator):
     bl_idname = "object.mio3_symmetry"
     bl_label = "Symmetrize & Recovery"
     bl_description = "Symmetrize meshes, shape keys, vertex groups, UVs, and normals"
@@ -21,17 +143,34 @@ class OBJECT_OT_mio3_symmetry(Operator):
     direction: EnumProperty(name="Direction", default="+X", items=[("-X", "-X → +X", ""), ("+X", "-X ← +X", "")])
     normal: BoolProperty(name="Normal", default=False)
     uvmap: BoolProperty(name="UVMap", default=False)
+    uvmap_all: BoolProperty(name="All UV Maps", default=False)
     facial: BoolProperty(name="UnSymmetrize L/R Facial ShapeKeys", default=False)
     remove_mirror_mod: BoolProperty(name="Remove Mirror Modifier", default=True)
+    store_mirror_map: BoolProperty(name="Store Mirror Map", default=False)
+    stream_shapekeys: BoolProperty(
+        name="Stream Shape Keys",
+        description="Symmetrize shape keys outside BMesh in batches to limit memory use",
+        default=False,
+    )
+    only_selected: BoolProperty(
+        name="Only Selected",
+        description="Re-symmetrize only the selected vertices and their mirror partners in place, keeping topology",
+        default=False,
+    )
+    selected_objects: BoolProperty(
+        name="Selected Objects",
+        description="Symmetrize every selected mesh, processing meshes shared by linked duplicates once",
+        default=False,
+    )
+    keep_topology: BoolProperty(
+        name="Keep Topology",
+        description="Mirror positions in place when the mesh already has a complete mirror map, keeping element indices",
+        default=False,
+    )
+    redo_token: StringProperty(options={"HIDDEN", "SKIP_SAVE"})
 
     _main_verts = []
     _sub_verts = []
-    _replace_name_map = {
-        "ウィンク": "MMD_Wink_R",
-        "ウィンク右": "MMD_Wink_L",
-        "ウィンク２": "MMD_Wink2_R",
-        "ｳｨﾝｸ２右": "MMD_Wink2_L",
-    }
 
     @classmethod
     def poll(cls, context):
@@ -44,229 +183,557 @@ class OBJECT_OT_mio3_symmetry(Operator):
             return {"CANCELLED"}
 
         # bpy.ops.ed.undo_push()  # mesh.symmetrizeがReDoできない措置
+        # 前回の結果はこの invoke から始まるリドゥの間だけ使う
+        self.redo_token = mirror_cache.begin_redo()
         return self.execute(context)
 
     def execute(self, context):
-        start_time = time.time()
         obj = context.active_object
-
-        original_cursor_location = tuple(context.scene.cursor.location)
-        original_location = obj.location
-
-        for o in context.scene.objects:
-            if o != obj:
-                o.select_set(False)
-
-        # 状態を保存
-        if self.orient_type == "GLOBAL" and obj.location.x != 0:
-            context.scene.cursor.location = (0,) + original_location[1:]
-            bpy.ops.object.origin_set(type="ORIGIN_CURSOR", center="MEDIAN")
-            bpy.ops.object.transform_apply(location=False, rotation=True, scale=False)
-        active_shape_key_index = obj.active_shape_key_index
-
-        for mod in obj.modifiers:
-            if self.remove_mirror_mod and mod.type == "MIRROR":
-                obj.modifiers.remove(mod)
-
-        vart_count_1 = len(obj.data.vertices)
-
-        orig_shapekey_weights = []
-        if obj.data.shape_keys:
-            for key in obj.data.shape_keys.key_blocks:
-                orig_shapekey_weights.append(key.value)
-                key.value = 0
-            obj.active_shape_key_index = 0
-
-        orig_modifier_states = []
-        for mod in obj.modifiers:
-            orig_modifier_states.append(mod.show_viewport)
-            mod.show_viewport = False
-
-        if self.normal and obj.data.has_custom_normals:
-            orgcopy = obj.copy()
-            orgcopy.data = obj.data.copy()
-            context.collection.objects.link(orgcopy)
+        self.profiler = profiler = create_profiler(self.bl_idname)
+        self._name_pairs = {}
+        # スクリプトや Repeat Last などリドゥ以外の実行では前回の結果を破棄する
+        self._use_redo = mirror_cache.check_redo(self.redo_token)
+
+        with profiler:
+            if self.selected_objects:
+                objects = [obj] if obj.type == "MESH" and is_local(obj) else []
+                objects += [o for o in context.selected_objects if o != obj and o.type == "MESH" and is_local(o)]
+            else:
+                objects = [obj]
+
+            # リンク複製でメッシュを共有するオブジェクトは最初の1つだけ対称化する
+            owners = {}
+            for o in objects:
+                owners.setdefault(o.data, o)
+
+            vart_count_1 = vart_count_2 = 0
+            done = 0
+            for o in objects:
+                with profiler.object_scope(o.name) as counts:
+                    if owners[o.data] is o:
+                        counts["verts_before"] = len(o.data.vertices)
+                        done += self.symmetrize_object(o)
+                        counts["verts_after"] = len(o.data.vertices)
+                        vart_count_1 += counts["verts_before"]
+                        vart_count_2 += counts["verts_after"]
+                    else:
+                        counts["shared_with"] = owners[o.data].name
+                        self.remove_mirror_modifiers(o)
+
+            record = finish_profiler(
+                profiler,
+                object=obj.name,
+                objects_count=len(objects),
+                meshes_count=len(owners),
+                verts_before=vart_count_1,
+                verts_after=vart_count_2,
+            )
+        if not done:
+            return {"CANCELLED"}
+        stime = record["total_time"]
+        if len(objects) > 1:
+            self.report({"INFO"}, f"Mio3 Symmetry {len(objects)} objects ({len(owners)} meshes) {vart_count_1} → {vart_count_2}  Time: {stime:.4f}")  # fmt:skip
         else:
-            orgcopy = None
-
-        bm = bmesh.new()
-        bm.from_mesh(obj.data)
-
-        # 対称化
-        direction = "X" if self.direction == "+X" else "-X"
-        data = bm.verts[:] + bm.edges[:] + bm.faces[:]
-        bmesh.ops.symmetrize(bm, input=data, direction=direction, use_shapekey=True, dist=1e-5)
-
-        for elem in bm.verts[:] + bm.edges[:] + bm.faces[:]:
-            elem.hide_set(False)
-            elem.select_set(False)
+            self.report({"INFO"}, f"Mio3 Symmetry {vart_count_1} → {vart_count_2}  Time: {stime:.4f}")  # fmt:skip
+        return {"FINISHED"}
 
-        select_condition = lambda x: x <= 0 if self.direction == "+X" else x >= 0
-        for v in bm.verts:
-            if select_condition(v.co.x):
-                v.select = True
+    def symmetrize_object(self, obj):
+        profiler = self.profiler
 
-        if self.uvmap:
-            self.symm_uv(obj, bm)
+        # グローバルではワールド座標のX=0で対称化するため、メッシュをワールド空間に移して処理する
+        matrix = self.get_world_matrix(obj)
+        if matrix is not None and not self.check_world_matrix(obj, matrix):
+            return False
+        if self.only_selected and not self.get_selected_verts(obj.data).any():
+            self.report({"WARNING"}, f"{obj.name}: no vertices selected")
+            return False
 
-        self.symm_vgroups(obj, bm)
+        self.remove_mirror_modifiers(obj)
 
-        if self.normal and obj.data.has_custom_normals:
-            vg = self.create_temp_vgroup(obj, bm)
-            vg_name = vg.name  # UnicodeDecodeError 対策
-        else:
-            vg, vg_name = None, None
+        if matrix is not None:
+            with profiler.stage("To World", verts=len(obj.data.vertices)):
+                obj.data.transform(matrix, shape_keys=True)
 
-        bm.to_mesh(obj.data)
-        bm.free()
-        obj.data.update()
+        with profiler.stage("Mirror Map") as counts:
+            if self.only_selected:
+                recovery = self.get_selection_map(obj.data)
+            elif self.keep_topology:
+                recovery = self.get_recovery_map(obj.data)
+            else:
+                recovery = None
+            counts["complete"] = recovery is not None
 
-        if self.normal and obj.data.has_custom_normals and vg:
-            self.symm_normal(obj, orgcopy, vg.name)
+        if recovery is not None:
+            self.recover_symmetry(obj, *recovery)
+        elif not self.only_selected:
+            self.symmetrize_bmesh(obj)
 
         if self.facial:
-            self.unsymm_facial(obj)
-
-        # 状態を戻す
-        if obj.data.shape_keys:
-            for i, weight in enumerate(orig_shapekey_weights):
-                obj.data.shape_keys.key_blocks[i].value = weight
-        for i, state in enumerate(orig_modifier_states):
-            obj.modifiers[i].show_viewport = state
-
-        if original_cursor_location is not None:
-            context.scene.cursor.location = original_cursor_location
-
-        obj.active_shape_key_index = active_shape_key_index
-
-        if vg and vg_name in obj.vertex_groups:
-            obj.vertex_groups.remove(obj.vertex_groups[vg_name])
-
-        if orgcopy is not None:
-            copy_mesh = orgcopy.data
-            bpy.data.objects.remove(orgcopy, do_unlink=True)
-            bpy.data.meshes.remove(copy_mesh, do_unlink=True)
-
-        vart_count_2 = len(obj.data.vertices)
-        stime = time.time() - start_time
-        self.report({"INFO"}, f"Mio3 Symmetry {vart_count_1} → {vart_count_2}  Time: {stime:.4f}")  # fmt:skip
-        return {"FINISHED"}
-
-    def create_temp_vgroup(self, obj, bm):
-        deform_layer = bm.verts.layers.deform.verify()
+            with profiler.stage("Facial"):
+                self.unsymm_facial(obj)
+
+        # 対応は対称化した空間で求め、ハッシュはローカル座標とワールド行列から作る
+        # （行列付きのハッシュはローカル空間で対応を読む処理では一致しないため、ワールドの対応が使われない）
+        vert_map = None
+        if self.store_mirror_map:
+            with profiler.stage("Mirror Map", verts=len(obj.data.vertices)):
+                vert_map = mirror_cache.get_vertex_mirror_map(obj.data, get_vertex_coords(obj.data))
+
+        if matrix is not None:
+            with profiler.stage("To Local", verts=len(obj.data.vertices)):
+                obj.data.transform(matrix.inverted_safe(), shape_keys=True)
+
+        if vert_map is not None:
+            with profiler.stage("Store Mirror Map", verts=len(obj.data.vertices)):
+                mirror_cache.store_mirror_attribute(obj.data, get_vertex_coords(obj.data), vert_map, matrix)
+        return True
+
+    def symmetrize_bmesh(self, obj):
+        profiler = self.profiler
+        mesh = obj.data
+        if self.normal and mesh.has_custom_normals:
+            with profiler.stage("Normal Source", loops=len(mesh.loops)):
+                normal_source = self.get_normal_source(mesh)
+        else:
+            normal_source = None
 
-        if TMP_VG_NAME in obj.vertex_groups:
-            vg = obj.vertex_groups[TMP_VG_NAME]
-            obj.vertex_groups.remove(vg)
-        vg = obj.vertex_groups.new(name=TMP_VG_NAME)
+        if self.stream_shapekeys and mesh.shape_keys:
+            with profiler.stage("Store Shape Keys", shape_keys=len(mesh.shape_keys.key_blocks)):
+                key_store = self.store_shape_keys(obj)
+        else:
+            key_store = None
+
+        # オプションの変更によるリドゥでは、対称化と頂点ウェイトまでの結果を使い回す
+        redo_key = cached = None
+        if key_store is None and self.redo_token:
+            with profiler.stage("Redo Key") as counts:
+                redo_key = self.get_redo_key(obj)
+                if self._use_redo:
+                    cached = mirror_cache.lookup_redo(mesh, redo_key)
+                counts["hit"] = cached is not None
+        if cached is not None:
+            with profiler.stage("BMesh Redo Cache", verts=len(cached.verts)):
+                cached.to_mesh(mesh)
+        else:
+            with profiler.stage("BMesh Symmetrize", verts=len(mesh.vertices)) as counts:
+                bm = bmesh.new()
+                bm.from_mesh(mesh)
+                if key_store is not None:
+                    for layer in bm.verts.layers.shape.values():
+                        bm.verts.layers.shape.remove(layer)
+
+                # 対称化
+                direction = "X" if self.direction == "+X" else "-X"
+                data = bm.verts[:] + bm.edges[:] + bm.faces[:]
+                bmesh.ops.symmetrize(bm, input=data, direction=direction, use_shapekey=key_store is None, dist=1e-5)
+
+                for elem in bm.verts[:] + bm.edges[:] + bm.faces[:]:
+                    elem.hide_set(False)
+                    elem.select_set(False)
+
+                select_condition = lambda x: x <= 0 if self.direction == "+X" else x >= 0
+                for v in bm.verts:
+                    if select_condition(v.co.x):
+                        v.select = True
+                counts["result_verts"] = len(bm.verts)
+
+            with profiler.stage("Vertex Groups", groups=len(obj.vertex_groups)):
+                self.symm_vgroups(obj, bm)
+
+            with profiler.stage("BMesh To Mesh"):
+                bm.to_mesh(mesh)
+                if redo_key is not None:
+                    mirror_cache.store_redo(mesh, redo_key, bm)
+                else:
+                    bm.free()
 
-        for v in bm.verts:
-            if v.select:
-                if v.co.x != 0.0:
-                    v[deform_layer][vg.index] = 1.0
-        return vg
+        if key_store is not None:
+            with profiler.stage("Rebuild Shape Keys", shape_keys=len(mesh.shape_keys.key_blocks)):
+                self.rebuild_shape_keys(obj, key_store)
+        mesh.update()
 
-    # UV
-    def symm_uv(self, obj, bm):
-        uv_group = obj.mio3qs.uv_group
-        uv_layer = bm.loops.layers.uv.active
-        p_layer = bm.faces.layers.int.get(NAME_ATTR_GROUP)
-        if not uv_layer:
+        if self.uvmap:
+            with profiler.stage("UV", loops=len(mesh.loops), uv_maps=len(self.get_uv_layers(mesh))):
+                self.symm_uv(obj)
+
+        if normal_source is not None and mesh.has_custom_normals:
+            with profiler.stage("Normals", loops=len(mesh.loops)):
+                self.symm_normal(obj, normal_source)
+
+    def get_redo_key(self, obj):
+        """リドゥで結果を使い回せるかの判定用のキー
+
+        シェイプキーとUVは1つずつ同じバッファに読んで CRC を続けて計算し、すべてを同時に持たない
+        """
+        mesh = obj.data
+        loop_vert, loop_start, _, _ = get_loop_topology(mesh)
+        fingerprint = mirror_cache.mesh_fingerprint(get_vertex_coords(mesh), loop_vert, loop_start)
+        crc = 0
+        if mesh.shape_keys:
+            coords = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+            for kb in mesh.shape_keys.key_blocks:
+                kb.data.foreach_get("co", coords)
+                crc = zlib.crc32(coords, crc)
+        if mesh.uv_layers:
+            uv = np.empty(len(mesh.loops) * 2, dtype=np.float32)
+            for uv_layer in mesh.uv_layers:
+                uv_layer.data.foreach_get("uv", uv)
+                crc = zlib.crc32(uv, crc)
+        layers = (len(mesh.shape_keys.key_blocks) if mesh.shape_keys else 0, len(mesh.uv_layers), crc)
+        names = tuple(vg.name for vg in obj.vertex_groups)
+        return self.direction, self.orient_type, names, fingerprint, layers
+
+    # シェイプキー
+    @staticmethod
+    def store_shape_keys(obj):
+        """シェイプキーの座標と設定を退避し、Basis 以外のキーブロックを削除する
+
+        BMesh に読み込むシェイプキーのレイヤーを Basis だけにするため。
+        Key データブロックは残すので、キーの値のアニメーションやドライバーはパスで元のキーに戻る
+        大きい場合は座標を一時ファイルに書き出す
+        """
+        mesh = obj.data
+        key_blocks = mesh.shape_keys.key_blocks
+        v_len = len(mesh.vertices)
+        edges = np.empty((len(mesh.edges), 2), dtype=np.int32)
+        mesh.edges.foreach_get("vertices", edges.ravel())
+
+        shape = (len(key_blocks), v_len, 3)
+        file = None
+        if np.prod(shape) * 4 > SHAPEKEY_SPILL_BYTES:
+            file = tempfile.TemporaryFile()
+            store = np.memmap(file, dtype=np.float32, mode="w+", shape=shape)
+        else:
+            store = np.empty(shape, dtype=np.float32)
+        for i, kb in enumerate(key_blocks):
+            kb.data.foreach_get("co", store[i].ravel())
+        if file is not None:
+            store.flush()
+
+        settings = [
+            {
+                "name": kb.name,
+                "relative_key": kb.relative_key.name,
+                "slider_min": kb.slider_min,
+                "slider_max": kb.slider_max,
+                "value": kb.value,
+                "mute": kb.mute,
+                "vertex_group": kb.vertex_group,
+                "interpolation": kb.interpolation,
+                "lock_shape": kb.lock_shape,
+            }
+            for kb in key_blocks
+        ]
+        active_index = obj.active_shape_key_index
+        for kb in reversed(key_blocks[1:]):
+            obj.shape_key_remove(kb)
+        return file, store, get_vertex_coords(mesh), edges, settings, active_index
+
+    def rebuild_shape_keys(self, obj, key_store):
+        """対称化後の頂点を元の頂点に対応付け、シェイプキーを作り直してバッチごとに書き戻す"""
+        file, store, src_co, src_edges, settings, active_index = key_store
+        mesh = obj.data
+        co = get_vertex_coords(mesh)
+        v_len = len(co)
+        mirror = MIRROR_X
+        is_target = co[:, 0] < 0.0 if self.direction == "+X" else co[:, 0] > 0.0
+
+        src_index = np.empty(v_len, dtype=np.int64)
+        sources, targets = np.flatnonzero(~is_target), np.flatnonzero(is_target)
+        src_index[sources] = find_nearest_indices(src_co, co[sources], 1e-4)
+        src_index[targets] = find_nearest_indices(src_co, co[targets] * mirror, 1e-4)
+
+        # 中心で切断された辺の上に作られた頂点は、辺の両端から補間する
+        split_verts = np.flatnonzero(src_index < 0)
+        edge_a, edge_b = src_edges[:, 0], src_edges[:, 1]
+        xa, xb = src_co[edge_a, 0], src_co[edge_b, 0]
+        crossing = np.flatnonzero(xa * xb < 0.0)
+        if len(split_verts) and len(crossing):
+            t = xa[crossing] / (xa[crossing] - xb[crossing])
+            points = src_co[edge_a[crossing]] + (src_co[edge_b[crossing]] - src_co[edge_a[crossing]]) * t[:, None]
+            points[:, 0] = 0.0
+            hit = find_nearest_indices(points, co[split_verts], 1e-4)
+            found = hit >= 0
+            split_verts, hit = split_verts[found], hit[found]
+            split_a, split_b = edge_a[crossing[hit]], edge_b[crossing[hit]]
+            split_t = t[hit].astype(np.float32)[:, None]
+        else:
+            split_verts = split_a = split_b = np.empty(0, dtype=np.int64)
+            split_t = np.empty((0, 1), dtype=np.float32)
+
+        direct = np.flatnonzero(~is_target & (src_index >= 0))
+        mirrored = np.flatnonzero(is_target & (src_index >= 0))
+        center = np.flatnonzero(co[:, 0] == 0.0)
+
+        for setting in settings[1:]:
+            obj.shape_key_add(name=setting["name"], from_mix=False)
+        key_blocks = mesh.shape_keys.key_blocks
+        for kb, setting in zip(key_blocks, settings):
+            kb.relative_key = key_blocks.get(setting["relative_key"], key_blocks[0])
+            # slider_min は slider_max 未満に制限されるため、新しい範囲が今の max 以上なら max から広げる
+            if setting["slider_min"] >= kb.slider_max:
+                kb.slider_max = setting["slider_max"]
+                kb.slider_min = setting["slider_min"]
+            else:
+                kb.slider_min = setting["slider_min"]
+                kb.slider_max = setting["slider_max"]
+            kb.value = setting["value"]
+            kb.mute = setting["mute"]
+            kb.vertex_group = setting["vertex_group"]
+            kb.interpolation = setting["interpolation"]
+            kb.lock_shape = setting["lock_shape"]
+        obj.active_shape_key_index = active_index
+
+        buffer = np.empty((SHAPEKEY_BATCH_SIZE, v_len, 3), dtype=np.float32)
+        try:
+            for start in range(0, len(key_blocks), SHAPEKEY_BATCH_SIZE):
+                src = store[start : start + SHAPEKEY_BATCH_SIZE]
+                out = buffer[: len(src)]
+                out[:] = co
+                out[:, direct] = src[:, src_index[direct]]
+                out[:, mirrored] = src[:, src_index[mirrored]] * mirror
+                out[:, split_verts] = src[:, split_a] + (src[:, split_b] - src[:, split_a]) * split_t
+                out[:, center, 0] = 0.0
+                for i, kb in enumerate(key_blocks[start : start + len(src)]):
+                    kb.data.foreach_set("co", out[i].ravel())
+        finally:
+            del store
+            if file is not None:
+                file.close()
+
+    def symm_uv(self, obj):
+        mesh = obj.data
+        uv_layers = self.get_uv_layers(mesh)
+        if not uv_layers or not mesh.polygons:
             return
 
+        co = get_vertex_coords(mesh)
+        loop_vert, loop_start, _, loop_face = get_loop_topology(mesh)
+
         if self.direction == "+X":
-            v_is_source_side = [v.co.x < 0.0 for v in bm.verts]
+            v_is_source_side = co[:, 0] < 0.0
         else:
-            v_is_source_side = [v.co.x > 0.0 for v in bm.verts]
-
-        def face_on_source_side(face) -> bool:
-            for v in face.verts:
-                if v_is_source_side[v.index]:
-                    return True
-            return False
+            v_is_source_side = co[:, 0] > 0.0
+        face_on_source_side = np.logical_or.reduceat(v_is_source_side[loop_vert], loop_start)
 
-        if not p_layer:
-            pivot_u = 0.5
-            for face in bm.faces:
-                if not face_on_source_side(face):
-                    continue
-                for loop in face.loops:
-                    uv = loop[uv_layer].uv
-                    dx = uv.x - pivot_u
-                    uv.x = pivot_u if abs(dx) < 1e-5 else pivot_u - dx
+        if (face_group := get_face_groups(mesh)) is None:
+            loop_mask = face_on_source_side[loop_face]
+            pivot_u = np.full(np.count_nonzero(loop_mask), 0.5)
+            off_v = None
         else:
-            coord_u = [it.uv_coord_u for it in uv_group.items]
-            offset_v = [it.uv_offset_v for it in uv_group.items]
-            u_len = len(coord_u)
-
-            for face in bm.faces:
-                if not face_on_source_side(face):
-                    continue
-
-                uv_group_idx = face[p_layer]
-                if uv_group_idx < 0 or uv_group_idx >= u_len:
-                    continue
-
-                pivot_u = coord_u[uv_group_idx]
-                off_v = offset_v[uv_group_idx]
-                if off_v:
-                    for loop in face.loops:
-                        uv = loop[uv_layer].uv
-                        dx = uv.x - pivot_u
-                        uv.x = pivot_u if abs(dx) < 1e-5 else pivot_u - dx
-                        uv.y += off_v
-                else:
-                    for loop in face.loops:
-                        uv = loop[uv_layer].uv
-                        dx = uv.x - pivot_u
-                        uv.x = pivot_u if abs(dx) < 1e-5 else pivot_u - dx
-
-    # 頂点ウェイト
-    def symm_vgroups(self, obj, bm):
-        deform_layer = bm.verts.layers.deform.verify()
-        symmetric_groups = self.symmetric_group_mapping(obj)
-        select_condition = lambda x: x <= 0 if self.direction == "+X" else x >= 0
+            coord_u, offset_v = get_uv_group_table(obj)
+            face_mask = face_on_source_side & (face_group >= 0) & (face_group < len(coord_u))
+            loop_mask = face_mask[loop_face]
+            loop_group = face_group[loop_face[loop_mask]]
+            pivot_u = coord_u[loop_group]
+            off_v = offset_v[loop_group] if offset_v.any() else None
+
+        if not loop_mask.any():
+            return
 
-        for v in bm.verts:
-            if not v.select:
-                continue
+        uv = np.empty((len(loop_vert), 2), dtype=np.float32)
+        for uv_layer in uv_layers:
+            uv_layer.data.foreach_get("uv", uv.ravel())
+            uv[loop_mask] = mirror_uv(uv[loop_mask], pivot_u, off_v)
+            uv_layer.data.foreach_set("uv", uv.ravel())
 
-            if not select_condition(v.co.x):
-                continue
+    # 法線
+    @staticmethod
+    def get_normal_source(mesh):
+        co = get_vertex_coords(mesh)
+        loop_vert, loop_start, _, loop_face = get_loop_topology(mesh)
+        fingerprint = mirror_cache.mesh_fingerprint(co, loop_vert, loop_start)
+        return fingerprint, co, loop_vert, loop_face, get_face_centers(mesh), get_corner_normals(mesh)
+
+    def symm_normal(self, obj, normal_source):
+        mesh = obj.data
+        fingerprint, src_co, src_loop_vert, src_loop_face, src_centers, src_normals = normal_source
+        mirror = MIRROR_X
+
+        # 対称化の結果は元のメッシュと方向だけで決まるので、ループの対応はキャッシュできる
+        kind = ("normal_loops", self.direction)
+        if (loop_pairs := mirror_cache.lookup(mesh, kind, fingerprint)) is None:
+            co = get_vertex_coords(mesh)
+            loop_vert, _, _, loop_face = get_loop_topology(mesh)
+            if self.direction == "+X":
+                v_is_target = co[:, 0] < 0.0
+            else:
+                v_is_target = co[:, 0] > 0.0
+
+            target_verts = np.flatnonzero(v_is_target)
+            vert_map = np.full(len(co), -1, dtype=np.int64)
+            vert_map[target_verts] = find_nearest_indices(src_co, co[target_verts] * mirror, 1e-4)
+
+            target_loops = np.flatnonzero(v_is_target[loop_vert])
+            centers = get_face_centers(mesh)
+            src_loops = find_nearest_face_loops(
+                src_loop_vert,
+                src_loop_face,
+                src_centers,
+                vert_map[loop_vert[target_loops]],
+                centers[loop_face[target_loops]] * mirror,
+            )
+            found = src_loops >= 0
+            loop_pairs = (target_loops[found], src_loops[found])
+            mirror_cache.store(mesh, kind, fingerprint, loop_pairs)
+
+        target_loops, src_loops = loop_pairs
+        normals = reflect_x(get_corner_normals(mesh), target_loops, src_normals, src_loops)
+        mesh.normals_split_custom_set(normals)
+
+    # トポロジーを維持した対称化
+    def get_recovery_map(self, mesh):
+        co = get_vertex_coords(mesh)
+        edges = np.empty((len(mesh.edges), 2), dtype=np.int32)
+        mesh.edges.foreach_get("vertices", edges.ravel())
+
+        # 保存済みの対応は座標が多少ずれていても、辺の対応が取れておおよそ左右対称の位置にあれば使う
+        vert_map = mirror_cache.load_mirror_attribute(mesh, co, check_positions=False)
+        if vert_map is None or not is_complete_mirror_map(vert_map, edges) or not mirror_map_fits(co, vert_map):
+            vert_map = mirror_cache.get_vertex_mirror_map(mesh, co)
+            if not is_complete_mirror_map(vert_map, edges):
+                return None
+        return co, vert_map
+
+    @staticmethod
+    def get_selected_verts(mesh):
+        selected = np.zeros(len(mesh.vertices), dtype=bool)
+        mesh.vertices.foreach_get("select", selected)
+        return selected
+
+    def get_selection_map(self, mesh):
+        """選択頂点の範囲だけを対称化するための対応表"""
+        co = get_vertex_coords(mesh)
+        return co, mirror_cache.get_vertex_mirror_map(mesh, co), self.get_selected_verts(mesh)
+
+    def recover_symmetry(self, obj, co, vert_map, mask=None):
+        profiler = self.profiler
+        mesh = obj.data
+        is_target, targets, sources, centers = recovery_sides(co, vert_map, self.direction == "+X", mask)
+
+        with profiler.stage("Recover Positions", verts=len(co), targets=len(targets)) as counts:
+            mirror_positions(co, targets, sources, centers)
+            mesh.vertices.foreach_set("co", co.ravel())
+            if mesh.shape_keys:
+                counts["shape_keys"] = len(mesh.shape_keys.key_blocks)
+                coords = np.empty_like(co)
+                for kb in mesh.shape_keys.key_blocks:
+                    kb.data.foreach_get("co", coords.ravel())
+                    mirror_positions(coords, targets, sources, centers)
+                    kb.data.foreach_set("co", coords.ravel())
+
+            # bmeshで対称化した場合と同じ選択状態にする（マスクがあれば触れた頂点の周りだけ）
+            selected = is_target.copy()
+            selected[centers] = True
+            if mask is None:
+                for elems in (mesh.vertices, mesh.edges, mesh.polygons):
+                    elems.foreach_set("hide", np.zeros(len(elems), dtype=bool))
+                    elems.foreach_set("select", np.zeros(len(elems), dtype=bool))
+                mesh.vertices.foreach_set("select", selected)
+            else:
+                touched = np.zeros(len(co), dtype=bool)
+                touched[targets] = touched[sources] = touched[centers] = True
+                self.set_hide_select(mesh.vertices, touched, selected)
+                edges = np.empty((len(mesh.edges), 2), dtype=np.int32)
+                mesh.edges.foreach_get("vertices", edges.ravel())
+                self.set_hide_select(mesh.edges, touched[edges].any(axis=1))
+                if len(mesh.polygons):
+                    loop_vert, loop_start, _, _ = get_loop_topology(mesh)
+                    self.set_hide_select(mesh.polygons, np.logical_or.reduceat(touched[loop_vert], loop_start))
+
+        with profiler.stage("Vertex Groups", groups=len(obj.vertex_groups)):
+            self.recover_vgroups(obj, targets, sources)
+        mesh.update()
+
+        if not self.uvmap and not (self.normal and mesh.has_custom_normals):
+            return
 
-            weight_dict = v[deform_layer]
-            if not weight_dict:
-                continue
+        with profiler.stage("Loop Map", loops=len(mesh.loops)):
+            loop_vert, loop_start, loop_total, loop_face = get_loop_topology(mesh)
+            maps = mirror_cache.get_mirror_maps(mesh, co, loop_vert, loop_start, loop_total, loop_face, vert_map=vert_map)
+            loop_map = maps[2]
 
-            temp_weights = {}
-            for vg_id, weight in weight_dict.items():
-                if vg_id in symmetric_groups:
-                    symmetric_id = symmetric_groups[vg_id]
-                    if symmetric_id != vg_id:
-                        temp_weights[vg_id] = weight
-                        weight_dict[vg_id] = weight_dict.get(symmetric_id, 0.0)
+        if self.uvmap:
+            with profiler.stage("UV", loops=len(loop_vert), uv_maps=len(self.get_uv_layers(mesh))):
+                self.recover_uv(obj, is_target, centers, loop_vert, loop_start, loop_face, loop_map)
+
+        if self.normal and mesh.has_custom_normals:
+            with profiler.stage("Normals", loops=len(loop_vert)):
+                loops = np.flatnonzero(is_target[loop_vert] & (loop_map >= 0))
+                normals = get_corner_normals(mesh)
+                mesh.normals_split_custom_set(reflect_x(normals, loops, normals, loop_map[loops]))
+
+    @staticmethod
+    def set_hide_select(elems, touched, selected=None):
+        """touched の要素だけ表示し、選択を selected（省略時は解除）にする"""
+        hide = np.zeros(len(elems), dtype=bool)
+        elems.foreach_get("hide", hide)
+        hide[touched] = False
+        elems.foreach_set("hide", hide)
+        select = np.zeros(len(elems), dtype=bool)
+        elems.foreach_get("select", select)
+        select[touched] = False if selected is None else selected[touched]
+        elems.foreach_set("select", select)
+
+    def recover_uv(self, obj, is_target, centers, loop_vert, loop_start, loop_face, loop_map):
+        mesh = obj.data
+        uv_layers = self.get_uv_layers(mesh)
+        if not uv_layers:
+            return
 
-            for vg_id, weight in temp_weights.items():
-                symmetric_id = symmetric_groups[vg_id]
-                weight_dict[symmetric_id] = weight
-                if not weight_dict[vg_id]:
-                    del weight_dict[vg_id]
+        loops = recovery_loops(is_target, centers, loop_vert, loop_start, loop_face, loop_map)
+        src_loops = loop_map[loops]
+        mirror_mask = np.ones(len(loops), dtype=bool)
 
-    # 法線
-    def symm_normal(self, obj, orgcopy, vg_name):
-        orgcopy.scale[0] *= -1
-        try:
-            transfer_modifier = obj.modifiers.new(name=TMP_DATA_TRANSFER_NAME, type="DATA_TRANSFER")
-            transfer_modifier.object = orgcopy
-            transfer_modifier.vertex_group = vg_name
-            transfer_modifier.use_max_distance = True
-            transfer_modifier.max_distance = 0.0001
-            transfer_modifier.data_types_loops = {"CUSTOM_NORMAL"}
-            with bpy.context.temp_override(object=obj):
-                bpy.ops.object.modifier_apply(modifier=transfer_modifier.name)
+        if (face_group := get_face_groups(mesh)) is None:
+            pivot_u = np.full(len(loops), 0.5)
+            off_v = None
+        else:
+            # 対称化で面をコピーした場合と同じく、グループも元の面から引き継ぐ
+            src_group = face_group[loop_face[src_loops]]
+            face_group[loop_face[loops]] = src_group
+            mesh.attributes[NAME_ATTR_GROUP].data.foreach_set("value", face_group)
+
+            coord_u, offset_v = get_uv_group_table(obj)
+            mirror_mask = (src_group >= 0) & (src_group < len(coord_u))
+            pivot_u = coord_u[src_group[mirror_mask]]
+            off_v = offset_v[src_group[mirror_mask]] if offset_v.any() else None
+
+        uv = np.empty((len(loop_vert), 2), dtype=np.float32)
+        for uv_layer in uv_layers:
+            uv_layer.data.foreach_get("uv", uv.ravel())
+            src_uv = uv[src_loops]
+            src_uv[mirror_mask] = mirror_uv(src_uv[mirror_mask], pivot_u, off_v)
+            uv[loops] = src_uv
+            uv_layer.data.foreach_set("uv", uv.ravel())
+
+    def recover_vgroups(self, obj, targets, sources):
+        if not obj.vertex_groups or not len(targets):
+            return
 
-        finally:
-            orgcopy.scale[0] *= -1
+        vertices = obj.data.vertices
+        items = [[(g.group, g.weight) for g in vertices[i].groups] for i in sources.tolist()]
+        counts = np.fromiter(map(len, items), dtype=np.int64, count=len(items))
+        group_ids = np.fromiter((vg_id for it in items for vg_id, _ in it), dtype=np.int32, count=int(counts.sum()))
+        weights = np.fromiter((w for it in items for _, w in it), dtype=np.float32, count=len(group_ids))
+
+        group_ids = swap_weight_groups(self.symmetric_group_mapping(obj), group_ids)
+        rows = np.repeat(targets, counts)
+
+        target_list = targets.tolist()
+        for vg in obj.vertex_groups:
+            vg.remove(target_list)
+
+        # 同じグループ・同じウェイトの頂点はまとめて追加する
+        order = np.lexsort((weights, group_ids))
+        group_ids, weights, rows = group_ids[order], weights[order], rows[order]
+        starts = np.flatnonzero(np.r_[True, (group_ids[1:] != group_ids[:-1]) | (weights[1:] != weights[:-1])])
+        ends = np.r_[starts[1:], len(rows)]
+        vg_len = len(obj.vertex_groups)
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            vg_id = int(group_ids[start])
+            if vg_id < vg_len:
+                obj.vertex_groups[vg_id].add(rows[start:end].tolist(), float(weights[start]), "REPLACE")
 
     # 表情の非対称化
     def unsymm_facial(self, obj):
@@ -277,92 +744,204 @@ class OBJECT_OT_mio3_symmetry(Operator):
         if not key_blocks:
             return
 
-        self.rename_shape_keys(obj, self._replace_name_map)
-
         v_len = len(obj.data.vertices)
-        basis = obj.data.shape_keys.reference_key
-        basis_coords = np.zeros(v_len * 3, dtype=np.float32)
-        basis.data.foreach_get("co", basis_coords)
-
-        target_side_kind = "right" if self.direction == "+X" else "left"
-
-        for i, target_kb in enumerate(key_blocks):
-            info = parse_side_name(target_kb.name)
-            if not info or not info.get("has_side"):
-                continue
+        vertex_mask = np.zeros(v_len, dtype=bool)
+        obj.data.vertices.foreach_get("select", vertex_mask)
+        mask_indices = np.flatnonzero(vertex_mask)
+        if not len(mask_indices):
+            return
 
-            if info["side_kind"] != target_side_kind:
-                continue
+        basis = obj.data.shape_keys.reference_key
+        basis_coords = np.empty((v_len, 3), dtype=np.float32)
+        basis.data.foreach_get("co", basis_coords.ravel())
+        basis_masked = basis_coords[mask_indices]
 
-            source_name = get_mirror_name(target_kb.name)
-            if not source_name:
-                continue
+        source_coords = np.empty((v_len, 3), dtype=np.float32)
+        target_coords = np.empty((v_len, 3), dtype=np.float32)
 
-            source_kb = key_blocks.get(source_name)
-            if source_kb is None:
-                continue
+        for target, source in self.get_facial_pairs(key_blocks.keys()):
+            source_kb, target_kb = key_blocks[source], key_blocks[target]
+            source_kb.data.foreach_get("co", source_coords.ravel())
+            target_kb.data.foreach_get("co", target_coords.ravel())
+            unsymmetrize_key(source_coords, target_coords, basis_masked, mask_indices)
+            target_kb.data.foreach_set("co", target_coords.ravel())
+            source_kb.data.foreach_set("co", source_coords.ravel())
 
-            vertex_mask = np.array([v.select for v in obj.data.vertices], dtype=bool)
-            mask_indices = np.where(vertex_mask)[0]
+    def draw(self, context):
+        layout = self.layout
+        layout.use_property_split = True
+        layout.use_property_decorate = False
+        layout.row().prop(self, "orient_type", expand=True)
+        layout.row().prop(self, "direction", expand=True)
+        layout.separator()
+        layout.use_property_split = False
+        box = layout.box()
+        col = box.column()
+        col.label(text="Options:")
+        col.prop(self, "selected_objects")
+        col.prop(self, "normal")
+        col.prop(self, "uvmap")
+        row = col.row()
+        row.active = self.uvmap
+        row.prop(self, "uvmap_all")
+        col.prop(self, "facial")
+        col.prop(self, "remove_mirror_mod")
+        col.prop(self, "store_mirror_map")
+        col.prop(self, "keep_topology")
+        col.prop(self, "only_selected")
+        col.prop(self, "stream_shapekeys")
 
-            if len(mask_indices) == 0:
-                continue
+        draw_record(layout, self.bl_idname)
 
-            source_coords = np.zeros(v_len * 3, dtype=np.float32)
-            source_kb.data.foreach_get("co", source_coords)
 
-            target_coords = np.zeros(v_len * 3, dtype=np.float32)
-            target_kb.data.foreach_get("co", target_coords)
+class MESH_OT_mio3_symmetry(Mio3SymmetryOperator, Operator):
+    bl_idname = "mesh.mio3_symmetry"
+    bl_label = "Symmetrize & Recovery"
+    bl_description = "Symmetrize the edit mesh, shape keys, vertex groups, and UVs without leaving Edit Mode"
+    bl_options = {"REGISTER", "UNDO"}
 
-            for idx in mask_indices:
-                coord_idx = idx * 3
-                target_coords[coord_idx : coord_idx + 3] = source_coords[coord_idx : coord_idx + 3]
-            target_kb.data.foreach_set("co", target_coords)
+    orient_type: EnumProperty(name="Orientation", items=[("LOCAL", "Local", ""), ("GLOBAL", "Global", "")])
+    direction: EnumProperty(name="Direction", default="+X", items=[("-X", "-X → +X", ""), ("+X", "-X ← +X", "")])
+    only_selected: BoolProperty(name="Only Selected", default=False)
+    uvmap: BoolProperty(name="UVMap", default=False)
+    uvmap_all: BoolProperty(name="All UV Maps", default=False)
+    facial: BoolProperty(name="UnSymmetrize L/R Facial ShapeKeys", default=False)
+    remove_mirror_mod: BoolProperty(name="Remove Mirror Modifier", default=True)
 
-            for idx in mask_indices:
-                coord_idx = idx * 3
-                source_coords[coord_idx : coord_idx + 3] = basis_coords[coord_idx : coord_idx + 3]
-            source_kb.data.foreach_set("co", source_coords)
+    @classmethod
+    def poll(cls, context):
+        obj = context.active_object
+        return obj is not None and obj.type == "MESH" and obj.mode == "EDIT"
 
-        reverse_name_map = {v: k for k, v in self._replace_name_map.items()}
-        self.rename_shape_keys(obj, reverse_name_map)
+    def execute(self, context):
+        self.profiler = profiler = create_profiler(self.bl_idname)
+        self._name_pairs = {}
+
+        with profiler:
+            objects = [o for o in context.objects_in_mode_unique_data if o.type == "MESH" and is_local(o)]
+            vart_count_1 = vart_count_2 = 0
+            for obj in objects:
+                with profiler.object_scope(obj.name) as counts:
+                    bm = bmesh.from_edit_mesh(obj.data)
+                    counts["verts_before"] = len(bm.verts)
+                    self.symmetrize_edit_bmesh(obj, bm)
+                    counts["verts_after"] = len(bm.verts)
+                    bmesh.update_edit_mesh(obj.data)
+                    vart_count_1 += counts["verts_before"]
+                    vart_count_2 += counts["verts_after"]
+
+            record = finish_profiler(
+                profiler,
+                object=context.active_object.name,
+                objects_count=len(objects),
+                verts_before=vart_count_1,
+                verts_after=vart_count_2,
+            )
+        stime = record["total_time"]
+        self.report({"INFO"}, f"Mio3 Symmetry {vart_count_1} → {vart_count_2}  Time: {stime:.4f}")  # fmt:skip
+        return {"FINISHED"}
 
-    def rename_shape_keys(self, obj, map):
-        if obj.data.shape_keys:
-            for key in obj.data.shape_keys.key_blocks:
-                if key.name in map:
-                    key.name = map[key.name]
+    def symmetrize_edit_bmesh(self, obj, bm):
+        profiler = self.profiler
+        matrix = self.get_world_matrix(obj)
+        if matrix is not None and not self.check_world_matrix(obj, matrix):
+            return
 
-    def symmetric_group_mapping(self, obj):
-        symmetric_groups = {}
-        name_to_group = {vg.name: vg for vg in obj.vertex_groups}
-        processed_vgroup = set()
+        self.remove_mirror_modifiers(obj)
+
+        if matrix is not None:
+            with profiler.stage("To World", verts=len(bm.verts)):
+                self.transform_bmesh(bm, matrix)
+
+        with profiler.stage("BMesh Symmetrize") as counts:
+            if self.only_selected:
+                data = [e for elems in (bm.verts, bm.edges, bm.faces) for e in elems if e.select]
+            else:
+                data = bm.verts[:] + bm.edges[:] + bm.faces[:]
+            counts["input"] = len(data)
+            if data:
+                direction = "X" if self.direction == "+X" else "-X"
+                result = bmesh.ops.symmetrize(bm, input=data, direction=direction, use_shapekey=True, dist=1e-5)
+
+                # 対称化した範囲を選択する（頂点グループの入れ替え対象にもなる）
+                for elem in bm.verts[:] + bm.edges[:] + bm.faces[:]:
+                    elem.select_set(False)
+                geom = [e for e in data if e.is_valid] + result["geom_out"]
+                for elem in geom:
+                    elem.select_set(True)
+                bm.select_flush_mode()
+
+        if data:
+            with profiler.stage("Vertex Groups", groups=len(obj.vertex_groups)):
+                self.symm_vgroups(obj, bm)
+
+            if self.uvmap:
+                with profiler.stage("UV", uv_maps=len(self.get_uv_layers(obj.data))):
+                    self.symm_uv_bmesh(obj, bm, [f for f in geom if isinstance(f, bmesh.types.BMFace)])
+
+            if self.facial:
+                with profiler.stage("Facial"):
+                    self.unsymm_facial_bmesh(obj, bm)
+
+        if matrix is not None:
+            with profiler.stage("To Local", verts=len(bm.verts)):
+                self.transform_bmesh(bm, matrix.inverted_safe())
+
+    @staticmethod
+    def transform_bmesh(bm, matrix):
+        """頂点とシェイプキーのレイヤーを matrix で変換する"""
+        bmesh.ops.transform(bm, matrix=matrix, verts=bm.verts[:], use_shapekey=True)
+
+    def unsymm_facial_bmesh(self, obj, bm):
+        """シェイプキーのレイヤー間でコピーし、L/Rの表情シェイプキーを非対称化する（キーの名前は変えない）"""
+        shape_keys = obj.data.shape_keys
+        layers = bm.verts.layers.shape
+        if not shape_keys or (basis := layers.get(shape_keys.reference_key.name)) is None:
+            return
 
-        for vgroup in obj.vertex_groups:
-            vgroup_name = vgroup.name
-            if vgroup_name in processed_vgroup:
-                continue
+        # オブジェクトモードと同じく、選択した対称化の範囲のうち上書きする側の頂点
+        select_condition = lambda x: x <= 0 if self.direction == "+X" else x >= 0
+        verts = [v for v in bm.verts if v.select and select_condition(v.co.x)]
+        if not verts:
+            return
 
-            info = parse_side_name(vgroup_name)
-            if not info or not info.get("has_side"):
-                symmetric_groups[vgroup.index] = vgroup.index
-                processed_vgroup.add(vgroup_name)
-                continue
+        shape_layers = layers.values()
+        for target, source in self.get_facial_pairs(layers.keys()):
+            target_layer, source_layer = shape_layers[target], shape_layers[source]
+            for v in verts:
+                v[target_layer] = v[source_layer]
+                v[source_layer] = v[basis]
 
-            opposite_name = get_mirror_name(vgroup_name) or vgroup_name
-            opposite_group = name_to_group.get(opposite_name) if opposite_name else None
+    def symm_uv_bmesh(self, obj, bm, faces):
+        uv_layers = [bm.loops.layers.uv[layer.name] for layer in self.get_uv_layers(obj.data)]
+        if not uv_layers:
+            return
 
-            if not opposite_group or opposite_name == vgroup_name:
-                symmetric_groups[vgroup.index] = vgroup.index
-                processed_vgroup.add(vgroup_name)
-                continue
+        if self.direction == "+X":
+            faces = [f for f in faces if any(v.co.x < 0.0 for v in f.verts)]
+        else:
+            faces = [f for f in faces if any(v.co.x > 0.0 for v in f.verts)]
 
-            symmetric_groups[vgroup.index] = opposite_group.index
-            symmetric_groups[opposite_group.index] = vgroup.index
-            processed_vgroup.add(vgroup_name)
-            processed_vgroup.add(opposite_name)
+        p_layer = bm.faces.layers.int.get(NAME_ATTR_GROUP)
+        if p_layer is None:
+            loops = [l for f in faces for l in f.loops]
+            pivot_u = np.full(len(loops), 0.5)
+            off_v = None
+        else:
+            coord_u, offset_v = get_uv_group_table(obj)
+            faces = [f for f in faces if 0 <= f[p_layer] < len(coord_u)]
+            loops = [l for f in faces for l in f.loops]
+            loop_group = np.fromiter((f[p_layer] for f in faces for _ in f.loops), dtype=np.int32, count=len(loops))
+            pivot_u = coord_u[loop_group]
+            off_v = offset_v[loop_group] if offset_v.any() else None
+
+        if not loops:
+            return
 
-        return symmetric_groups
+        for uv_layer in uv_layers:
+            uv = np.array([l[uv_layer].uv[:] for l in loops], dtype=np.float32)
+            for l, co in zip(loops, mirror_uv(uv, pivot_u, off_v).tolist()):
+                l[uv_layer].uv = co
 
     def draw(self, context):
         layout = self.layout
@@ -375,13 +954,18 @@ class OBJECT_OT_mio3_symmetry(Operator):
         box = layout.box()
         col = box.column()
         col.label(text="Options:")
-        col.prop(self, "normal")
+        col.prop(self, "only_selected")
         col.prop(self, "uvmap")
+        row = col.row()
+        row.active = self.uvmap
+        row.prop(self, "uvmap_all")
         col.prop(self, "facial")
         col.prop(self, "remove_mirror_mod")
 
+        draw_record(layout, self.bl_idname)
 
-classes = [OBJECT_OT_mio3_symmetry]
+
+classes = [OBJECT_OT_mio3_symmetry, MESH_OT_mio3_symmetry]
 
 
 def menu_transform(self, context):
@@ -389,8 +973,14 @@ def menu_transform(self, context):
     self.layout.operator(OBJECT_OT_mio3_symmetry.bl_idname)
 
 
+def menu_edit_mesh(self, context):
+    self.layout.separator()
+    self.layout.operator(MESH_OT_mio3_symmetry.bl_idname)
+
+
 def register():
     bpy.types.VIEW3D_MT_object.append(menu_transform)
+    bpy.types.VIEW3D_MT_edit_mesh.append(menu_edit_mesh)
     for cls in classes:
         bpy.utils.register_class(cls)
 
@@ -398,4 +988,5 @@ def register():
 def unregister():
     for cls in classes:
         bpy.utils.unregister_class(cls)
+    bpy.types.VIEW3D_MT_edit_mesh.remove(menu_edit_mesh)
     bpy.types.VIEW3D_MT_object.remove(menu_transform)
@@ -1,5 +1,6 @@
 import bpy
 import bmesh
+import numpy as np
 from bpy.types import Operator, Panel, UIList, PropertyGroup
 from bpy.props import (
     FloatProperty,
@@ -11,7 +12,8 @@ from bpy.props import (
 )
 from .op_symmetrize_preview import UV_OT_mio3_symmetry_preview
 from .common import NAME_ATTR_GROUP
-from .utils import check_register, check_unregister
+from .core import remap_face_groups, faces_all_selected
+from .utils import check_register, check_unregister, get_face_groups
 
 BLENDER_5_OR_NEWER = bpy.app.version >= (5, 0, 0)
 
@@ -32,6 +34,52 @@ else:
         loop.uv_select_vert_set(value)
 
 
+def read_uv_vert_selection(mesh, bm, uv_layer):
+    """ループごとのUV頂点の選択状態をまとめて読む（update_from_editmode の後に呼ぶ）"""
+    l_len = len(mesh.loops)
+    loop_select = np.empty(l_len, dtype=bool)
+    if not BLENDER_5_OR_NEWER:
+        data = mesh.uv_layers.active.vertex_selection
+        if len(data) == l_len:
+            data.foreach_get("value", loop_select)
+            return loop_select
+    else:
+        attr = mesh.attributes.get(".uv_select_vert")
+        if attr is not None and attr.domain == "CORNER" and len(attr.data) == l_len:
+            attr.data.foreach_get("value", loop_select)
+            return loop_select
+    loop_select[:] = [uv_select_vert(loop, uv_layer) for face in bm.faces for loop in face.loops]
+    return loop_select
+
+
+def read_selected_faces(obj, bm, uv_layer):
+    """すべてのUV頂点が選択されている面のマスク"""
+    mesh = obj.data
+    p_len = len(mesh.polygons)
+    loop_start = np.empty(p_len, dtype=np.int32)
+    mesh.polygons.foreach_get("loop_start", loop_start)
+    loop_total = np.empty(p_len, dtype=np.int32)
+    mesh.polygons.foreach_get("loop_total", loop_total)
+    return faces_all_selected(read_uv_vert_selection(mesh, bm, uv_layer), loop_start, loop_total)
+
+
+def write_face_groups(bm, p_layer, old, new):
+    """変わった面だけBMeshのグループ番号を書き換える"""
+    changed = np.flatnonzero(new != old)
+    if not len(changed):
+        return
+    bm.faces.ensure_lookup_table()
+    faces = bm.faces
+    for i, value in zip(changed.tolist(), new[changed].tolist()):
+        faces[i][p_layer] = value
+
+
+def group_lut(face_group, group_count):
+    """グループ番号の恒等写像（属性に残っている範囲外の番号も含める）"""
+    size = max(group_count, int(face_group.max()) + 1 if len(face_group) else 0)
+    return np.arange(size, dtype=face_group.dtype)
+
+
 class Mio3qsUVGroupOperator:
     @classmethod
     def poll(cls, context):
@@ -45,6 +93,21 @@ class Mio3qsUVGroupOperator:
             return {"CANCELLED"}
         return self.execute(context)
 
+    @staticmethod
+    def assign_selected(obj, group_index):
+        """UV頂点がすべて選択されている面を group_index に割り当てる"""
+        obj.update_from_editmode()
+        bm = bmesh.from_edit_mesh(obj.data)
+        uv_layer = bm.loops.layers.uv.active
+        if (p_layer := bm.faces.layers.int.get(NAME_ATTR_GROUP)) is None:
+            p_layer = bm.faces.layers.int.new(NAME_ATTR_GROUP)
+            face_group = np.zeros(len(bm.faces), dtype=np.int32)
+        else:
+            face_group = get_face_groups(obj.data)
+
+        selected = read_selected_faces(obj, bm, uv_layer)
+        write_face_groups(bm, p_layer, face_group, np.where(selected, group_index, face_group))
+
 
 class OBJECT_OT_mio3qs_uv_group_add(Mio3qsUVGroupOperator, Operator):
     bl_idname = "object.mio3qs_uv_group_add"
@@ -105,12 +168,12 @@ class OBJECT_OT_mio3qs_uv_group_remove(Mio3qsUVGroupOperator, Operator):
         if (p_layer := bm.faces.layers.int.get(NAME_ATTR_GROUP)) is None:
             return {"CANCELLED"}
 
-        for face in bm.faces:
-            val = face[p_layer]
-            if val == active_index:
-                face[p_layer] = 0
-            elif val > active_index:
-                face[p_layer] -= 1
+        obj.update_from_editmode()
+        face_group = get_face_groups(obj.data)
+        lut = group_lut(face_group, len(uv_group.items))
+        lut[active_index] = 0
+        lut[active_index + 1 :] -= 1
+        write_face_groups(bm, p_layer, face_group, remap_face_groups(face_group, lut))
 
         uv_group.items.remove(active_index)
         if uv_group.items:
@@ -150,14 +213,11 @@ class OBJECT_OT_mio3qs_uv_group_move(Mio3qsUVGroupOperator, Operator):
         else:
             return {"CANCELLED"}
 
-        for face in bm.faces:
-            if face[p_layer] == swap_a:
-                face[p_layer] = -1
-            elif face[p_layer] == swap_b:
-                face[p_layer] = swap_a
-        for face in bm.faces:
-            if face[p_layer] == -1:
-                face[p_layer] = swap_b
+        obj.update_from_editmode()
+        face_group = get_face_groups(obj.data)
+        lut = group_lut(face_group, len(uv_group.items))
+        lut[swap_a], lut[swap_b] = swap_b, swap_a
+        write_face_groups(bm, p_layer, face_group, remap_face_groups(face_group, lut))
 
         uv_group.items.move(swap_a, swap_b)
         uv_group.active_index = swap_b
@@ -174,15 +234,8 @@ class OBJECT_OT_mio3qs_uv_group_assign(Mio3qsUVGroupOperator, Operator):
 
     def execute(self, context):
         obj = context.active_object
-        bm = bmesh.from_edit_mesh(obj.data)
-        uv_layer = bm.loops.layers.uv.active
-        if (p_layer := bm.faces.layers.int.get(NAME_ATTR_GROUP)) is None:
-            p_layer = bm.faces.layers.int.new(NAME_ATTR_GROUP)
-
         active_uv_group_index = obj.mio3qs.uv_group.active_index
-        for face in bm.faces:
-            if all(uv_select_vert(loop, uv_layer) for loop in face.loops):
-                face[p_layer] = active_uv_group_index
+        self.assign_selected(obj, active_uv_group_index)
 
         bmesh.update_edit_mesh(obj.data)
         UV_OT_mio3_symmetry_preview.redraw(context)
@@ -197,14 +250,7 @@ class OBJECT_OT_mio3qs_uv_group_unassign(Mio3qsUVGroupOperator, Operator):
 
     def execute(self, context):
         obj = context.active_object
-        bm = bmesh.from_edit_mesh(obj.data)
-        uv_layer = bm.loops.layers.uv.active
-        if (p_layer := bm.faces.layers.int.get(NAME_ATTR_GROUP)) is None:
-            p_layer = bm.faces.layers.int.new(NAME_ATTR_GROUP)
-
-        for face in bm.faces:
-            if all(uv_select_vert(loop, uv_layer) for loop in face.loops):
-                face[p_layer] = 0
+        self.assign_selected(obj, 0)
 
         bmesh.update_edit_mesh(obj.data)
         UV_OT_mio3_symmetry_preview.redraw(context)
@@ -414,7 +460,7 @@ class OBJECT_OT_mio3qs_init_props(Operator):
 
 
 def update_props(self, context):
-    UV_OT_mio3_symmetry_preview.redraw(context)
+    UV_OT_mio3_symmetry_preview.redraw(context, mesh_changed=False)
 
 
 class OBJECT_PG_mio3qs_uv_group_item(PropertyGroup):
@@ -424,7 +470,7 @@ class OBJECT_PG_mio3qs_uv_group_item(PropertyGroup):
 
 class OBJECT_PG_mio3qs_uv_group(PropertyGroup):
     items: CollectionProperty(name="UV Group Items", type=OBJECT_PG_mio3qs_uv_group_item)
-    active_index: IntProperty(name="Active Index")
+    active_index: IntProperty(name="Active Index", update=update_props)
 
 
 class OBJECT_PG_mio3qs(PropertyGroup):
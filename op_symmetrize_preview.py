@@ -1,13 +1,16 @@
 import bpy
-import bmesh
 import gpu
+import numpy as np
 from gpu_extras.batch import batch_for_shader
 from bpy.types import Operator, SpaceImageEditor
-from .common import NAME_ATTR_GROUP
-import time
+from .core import partition_preview_groups, mirror_preview_group
+from .mirror_cache import mesh_fingerprint
+from .utils import get_face_groups, get_uv_group_table
 
 msgbus_owner = object()
 
+REBUILD_DELAY = 0.1
+
 
 def reload_view(context):
     for window in context.window_manager.windows:
@@ -24,11 +27,19 @@ class UV_OT_mio3_symmetry_preview(Operator):
 
     _handle = None
     _color = (0.5, 0.5, 0.5, 1)
-    _vertices = []
-    _polygons = []
+    _groups = None
+    _positions = None
+    _mean_v = None
+    _table = None
+    _line_batches = {}
+    _tri_batch = None
+    _mesh_data = None
+    _mesh_key = None
+    _mesh_dirty = True
+    _syncing = False
+    _active_index = 0
     _active_u = 0.5
     _active_v = 0
-    _time = 0.0
 
     @classmethod
     def poll(cls, context):
@@ -40,6 +51,9 @@ class UV_OT_mio3_symmetry_preview(Operator):
         if cls.is_running():
             SpaceImageEditor.draw_handler_remove(cls._handle, "WINDOW")
             cls._handle = None
+        if bpy.app.timers.is_registered(rebuild_preview):
+            bpy.app.timers.unregister(rebuild_preview)
+        cls.clear_geometry()
         bpy.msgbus.clear_by_owner(msgbus_owner)
         reload_view(bpy.context)
 
@@ -48,11 +62,24 @@ class UV_OT_mio3_symmetry_preview(Operator):
         return cls._handle is not None
 
     @classmethod
-    def redraw(cls, context):
-        if cls.is_running():
+    def redraw(cls, context, mesh_changed=True):
+        if not cls.is_running():
+            return
+        if mesh_changed:
+            cls.mark_dirty()
+        else:
+            # グループの軸・オフセットの変更は変わったグループだけ反転し直すので、スライダー操作中もすぐ反映する
             cls.update_mesh(context)
             reload_view(context)
 
+    @classmethod
+    def mark_dirty(cls):
+        """メッシュの再読み込みを予約する（続けて呼ばれたら最後の呼び出しから REBUILD_DELAY 秒後にまとめて行う）"""
+        cls._mesh_dirty = True
+        if bpy.app.timers.is_registered(rebuild_preview):
+            bpy.app.timers.unregister(rebuild_preview)
+        bpy.app.timers.register(rebuild_preview, first_interval=REBUILD_DELAY)
+
     def invoke(self, context, event):
         cls = self.__class__
         is_running = cls.is_running()
@@ -71,7 +98,8 @@ class UV_OT_mio3_symmetry_preview(Operator):
 
         bpy.msgbus.subscribe_rna(key=(bpy.types.Object, "mode"), owner=msgbus_owner, args=(), notify=callback)
 
-        cls.redraw(context)
+        cls.update_mesh(context)
+        reload_view(context)
         context.window_manager.modal_handler_add(self)
         return {"RUNNING_MODAL"}
 
@@ -79,42 +107,34 @@ class UV_OT_mio3_symmetry_preview(Operator):
         cls = self.__class__
         if not cls.is_running():
             return {"FINISHED"}
-        
-        if event.type in ("LEFTMOUSE", "RET") and event.value == "RELEASE":
-            self.update_mesh(context)
-            reload_view(context)
-        if event.type == "Z" and event.ctrl and event.value == "RELEASE":
-            self.update_mesh(context)
-            reload_view(context)
-
+        # 再構築は depsgraph_handler とグループの変更から予約される
         return {"PASS_THROUGH"}
 
     @staticmethod
     def draw_2d(cls, context):
         region = context.region
         view_to_region = region.view2d.view_to_region
-
-        all_tris = []
-        for poly in cls._polygons:
-            if len(poly) < 3:
-                continue
-            for i in range(1, len(poly) - 1):
-                all_tris.extend([poly[0], poly[i], poly[i + 1]])
-
-        verts = [view_to_region(v[0], v[1], clip=False) for v in all_tris]
-        gpu.state.blend_set("ALPHA")
         shader = gpu.shader.from_builtin("UNIFORM_COLOR")
-        shader.bind()
-        shader.uniform_float("color", (0.18, 0.55, 0.67, 0.1))
-        batch = batch_for_shader(shader, "TRIS", {"pos": verts})
-        batch.draw(shader)
-        gpu.state.blend_set("NONE")
 
-        viewport_vertices = [view_to_region(v[0], v[1], clip=False) for v in cls._vertices]
-        batch = batch_for_shader(shader, "LINES", {"pos": viewport_vertices})
-        shader.bind()
-        shader.uniform_float("color", cls._color)
-        batch.draw(shader)
+        if cls._positions is not None:
+            # UV空間のままバッチを作っておき、パン・ズームは行列で変換する
+            x0, y0 = view_to_region(0.0, 0.0, clip=False)
+            x1, y1 = view_to_region(1.0, 1.0, clip=False)
+            gpu.matrix.push()
+            gpu.matrix.translate((x0, y0))
+            gpu.matrix.scale((x1 - x0, y1 - y0))
+
+            shader.bind()
+            if (tri_batch := cls.get_tri_batch(shader)) is not None:
+                gpu.state.blend_set("ALPHA")
+                shader.uniform_float("color", (0.18, 0.55, 0.67, 0.1))
+                tri_batch.draw(shader)
+                gpu.state.blend_set("NONE")
+            shader.uniform_float("color", cls._color)
+            for index in range(len(cls._positions)):
+                if (line_batch := cls.get_line_batch(shader, index)) is not None:
+                    line_batch.draw(shader)
+            gpu.matrix.pop()
 
         cx, _ = view_to_region(cls._active_u, 0.5, clip=False)
         line_pos = [(cx, 0), (cx, region.height)]
@@ -134,73 +154,135 @@ class UV_OT_mio3_symmetry_preview(Operator):
         gpu.state.line_width_set(1)
 
     @classmethod
-    def update_mesh(cls, context):
-        cls._vertices = []
-        cls._polygons = []
+    def get_line_batch(cls, shader, index):
+        """グループの辺のバッチ（座標が変わったグループだけ作り直す）"""
+        if index not in cls._line_batches:
+            edges = cls._groups[index][2]
+            batch = None
+            if len(edges):
+                batch = batch_for_shader(shader, "LINES", {"pos": cls._positions[index]}, indices=edges)
+            cls._line_batches[index] = batch
+        return cls._line_batches[index]
 
-        obj = context.active_object
-        if obj.type != "MESH" or obj.mode != "EDIT":
-            return cls.remove_handler()
+    @classmethod
+    def get_tri_batch(cls, shader):
+        if cls._tri_batch is None:
+            tris = cls._groups[cls._active_index][1]
+            if not len(tris):
+                return None
+            cls._tri_batch = batch_for_shader(shader, "TRIS", {"pos": cls._positions[cls._active_index]}, indices=tris)
+        return cls._tri_batch
 
-        bm = bmesh.from_edit_mesh(obj.data)
+    @classmethod
+    def clear_geometry(cls):
+        cls._groups = cls._positions = cls._mean_v = cls._table = None
+        cls._line_batches = {}
+        cls._tri_batch = None
+        cls._mesh_data = cls._mesh_key = None
+        cls._mesh_dirty = True
+        cls._syncing = False
 
-        uv_layer = bm.loops.layers.uv.active
-        p_layer = bm.faces.layers.int.get(NAME_ATTR_GROUP)
+    @classmethod
+    def update_mesh(cls, context):
+        obj = context.active_object
+        if obj is None or obj.type != "MESH" or obj.mode != "EDIT":
+            return cls.remove_handler()
 
         uv_group = obj.mio3qs.uv_group
         if not uv_group.items:
             return cls.remove_handler()
 
+        mesh = obj.data
+        if cls._mesh_dirty or cls._mesh_data is None or cls._mesh_key[0] != mesh.session_uid:
+            cls._mesh_dirty = False
+            if (mesh_data := cls.read_mesh(obj)) is None:
+                cls.clear_geometry()
+                return
+            mesh_key = (mesh.session_uid, mesh_fingerprint(*(a for a in mesh_data if a is not None)))
+            if mesh_key != cls._mesh_key:
+                cls._mesh_data, cls._mesh_key = mesh_data, mesh_key
+                cls._groups = None
+
         active_index = uv_group.active_index
-        active_item = uv_group.items[active_index]
-        vertices_extend = cls._vertices.extend
-        polygons_append = cls._polygons.append
-
-        cls._active_u = active_item.uv_coord_u
-        cls._active_v = active_item.uv_offset_v
-
-        sum_uv_y = 0.0
-        cnt_uv_y = 0
-
-        for face in bm.faces:
-            g_idx = face[p_layer]
-            g_item = uv_group.items[g_idx]
-            u_co = g_item.uv_coord_u
-            off_v = g_item.uv_offset_v
-
-            loops_uv = [cls.mirror_uv(l[uv_layer].uv.copy(), u_co, off_v) for l in face.loops]
-
-            if g_idx == active_index:
-                if len(loops_uv) >= 3:
-                    polygons_append(loops_uv)
-                for i in range(len(loops_uv)):
-                    vertices_extend((loops_uv[i], loops_uv[(i + 1) % len(loops_uv)]))
-
-                for l in face.loops:
-                    sum_uv_y += l[uv_layer].uv.y
-                cnt_uv_y += len(face.loops)
-            else:
-                for i in range(len(loops_uv)):
-                    vertices_extend((loops_uv[i], loops_uv[(i + 1) % len(loops_uv)]))
-
-        if cnt_uv_y:
-            cls._active_v += sum_uv_y / cnt_uv_y
-        
-        bm.free()
+        if active_index >= len(uv_group.items):
+            return
+        coord_u, offset_v = get_uv_group_table(obj, np.float32)
+        uv, loop_start, loop_total, face_group = cls._mesh_data
+
+        if cls._groups is None or len(cls._groups) != len(coord_u):
+            cls._groups, cls._mean_v = partition_preview_groups(uv, loop_start, loop_total, face_group, len(coord_u))
+            cls._positions = [None] * len(coord_u)
+            changed = range(len(coord_u))
+        else:
+            # 軸やオフセットが変わったグループだけ反転し直す
+            old_u, old_v = cls._table
+            changed = np.flatnonzero((coord_u != old_u) | (offset_v != old_v)).tolist()
+        cls._table = (coord_u, offset_v)
+
+        for index in changed:
+            cls._positions[index] = mirror_preview_group(uv, cls._groups[index][0], coord_u[index], offset_v[index])
+            cls._line_batches.pop(index, None)
+        if active_index in changed or active_index != cls._active_index:
+            cls._tri_batch = None
+
+        cls._active_index = active_index
+        cls._active_u = float(coord_u[active_index])
+        cls._active_v = float(offset_v[active_index] + cls._mean_v[active_index])
 
-    @staticmethod
-    def mirror_uv(uv, u_co, offset_v):
-        dx = uv.x - u_co
-        uv.x = u_co if abs(dx) < 0.0001 else u_co - dx
-        if offset_v:
-            uv.y += offset_v
-        return uv
+    @classmethod
+    def read_mesh(cls, obj):
+        # 編集中のBMeshをメッシュに書き戻してから配列でまとめて読む（再構築ごとに1回だけ）
+        # 書き戻しで起きる depsgraph の更新は depsgraph_handler で1回だけ無視する
+        cls._syncing = obj.update_from_editmode()
+        mesh = obj.data
+        uv_layer = mesh.uv_layers.active
+        if uv_layer is None:
+            return None
+
+        p_len = len(mesh.polygons)
+        loop_start = np.empty(p_len, dtype=np.int32)
+        mesh.polygons.foreach_get("loop_start", loop_start)
+        loop_total = np.empty(p_len, dtype=np.int32)
+        mesh.polygons.foreach_get("loop_total", loop_total)
+        uv = np.empty((len(mesh.loops), 2), dtype=np.float32)
+        uv_layer.data.foreach_get("uv", uv.ravel())
+        return uv, loop_start, loop_total, get_face_groups(mesh)
 
     @classmethod
     def unregister(cls):
         cls.remove_handler()
 
 
+def rebuild_preview():
+    cls = UV_OT_mio3_symmetry_preview
+    if cls.is_running():
+        cls.update_mesh(bpy.context)
+        reload_view(bpy.context)
+    return None
+
+
+@bpy.app.handlers.persistent
+def depsgraph_handler(scene, depsgraph):
+    cls = UV_OT_mio3_symmetry_preview
+    if not cls.is_running():
+        return
+    obj = bpy.context.active_object
+    if obj is None or obj.type != "MESH":
+        return
+
+    for update in depsgraph.updates:
+        if update.is_updated_geometry and update.id.original in (obj, obj.data):
+            break
+    else:
+        return
+
+    # read_mesh の書き戻し自身が発生させた更新は1回だけ無視する
+    if cls._syncing:
+        cls._syncing = False
+        return
+    cls.mark_dirty()
+
+
 @bpy.app.handlers.persistent
 def load_handler(dummy):
     UV_OT_mio3_symmetry_preview.remove_handler()
@@ -209,8 +291,10 @@ def load_handler(dummy):
 def register():
     bpy.utils.register_class(UV_OT_mio3_symmetry_preview)
     bpy.app.handlers.load_post.append(load_handler)
+    bpy.app.handlers.depsgraph_update_post.append(depsgraph_handler)
 
 
 def unregister():
+    bpy.app.handlers.depsgraph_update_post.remove(depsgraph_handler)
     bpy.app.handlers.load_post.remove(load_handler)
     bpy.utils.unregister_class(UV_OT_mio3_symmetry_preview)
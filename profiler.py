@@ -0,0 +1,115 @@
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# 最後に実行されたオペレーターの記録
+last_record = None
+
+
+class StageProfiler:
+    """処理段階ごとの時間・要素数・ピークメモリを記録する"""
+
+    def __init__(self, name, trace_memory=False):
+        self.name = name
+        self.trace_memory = trace_memory
+        self.stages = []
+        self.objects = []
+        self._object = None
+        self._started_tracing = False
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self._start = time.perf_counter()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        # 例外で finish まで進まなくてもメモリの追跡は必ず止める
+        self.stop()
+        return False
+
+    def stop(self):
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    @contextmanager
+    def stage(self, name, **counts):
+        entry = {"name": name, "time": 0.0, "counts": counts}
+        if self._object is not None:
+            entry["object"] = self._object
+        if self.trace_memory:
+            base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield entry["counts"]
+        finally:
+            entry["time"] = time.perf_counter() - start
+            if self.trace_memory:
+                entry["peak_bytes"] = max(0, tracemalloc.get_traced_memory()[1] - base)
+            self.stages.append(entry)
+
+    @contextmanager
+    def object_scope(self, name, **counts):
+        """バッチ処理でオブジェクトごとの合計時間を記録し、その間のステージに名前を付ける"""
+        entry = {"name": name, "time": 0.0, "counts": counts}
+        self._object = name
+        start = time.perf_counter()
+        try:
+            yield entry["counts"]
+        finally:
+            entry["time"] = time.perf_counter() - start
+            self._object = None
+            self.objects.append(entry)
+
+    def finish(self, log_path="", **info):
+        global last_record
+        self.stop()
+
+        record = {
+            "operator": self.name,
+            "timestamp": time.time(),
+            "total_time": time.perf_counter() - self._start,
+            "stages": self.stages,
+            "objects": self.objects,
+            **info,
+        }
+        last_record = record
+
+        if log_path:
+            with open(log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        return record
+
+
+def draw_record(layout, bl_idname):
+    """リドゥパネルに最後の記録を折りたたみ表示する"""
+    record = last_record
+    if record is None or record["operator"] != bl_idname:
+        return
+
+    header, body = layout.panel("MIO3SYM_PT_profile", default_closed=True)
+    header.label(text="Profile: {:.4f} s".format(record["total_time"]))
+    if body is None:
+        return
+
+    col = body.column(align=True)
+    if len(record["objects"]) > 1:
+        for entry in record["objects"]:
+            split = col.split(factor=0.45)
+            split.label(text=entry["name"], icon="OBJECT_DATA")
+            split.label(text="{:.1f} ms".format(entry["time"] * 1000))
+        col.separator()
+
+    for stage in record["stages"]:
+        split = col.split(factor=0.45)
+        split.label(text=stage["name"])
+        detail = "{:.1f} ms".format(stage["time"] * 1000)
+        if "peak_bytes" in stage:
+            detail += "  {:.1f} MB".format(stage["peak_bytes"] / 1048576)
+        split.label(text=detail)
+        if stage["counts"]:
+            col.label(text="  " + ", ".join("{}: {}".format(k, v) for k, v in stage["counts"].items()))
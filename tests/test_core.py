@@ -0,0 +1,306 @@
+"""core.py のテスト（Blender なしの CPython で実行できる）
+
+python -m pytest tests
+"""
+
+import importlib.util
+import os
+import numpy as np
+import pytest
+
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_module(name):
+    # パッケージの __init__ は bpy を読み込むので、ファイルを直接読み込む
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ADDON_DIR, name + ".py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+core = load_module("core")
+utils_mirror = load_module("utils_mirror")
+
+
+def symmetric_points(rng, count, centers=0):
+    """X について対称な点群（centers 個は X=0 上）"""
+    half = rng.uniform(0.01, 1.0, (count, 3)) * np.array((1.0, 1.0, 1.0))
+    mirrored = half * np.array((-1.0, 1.0, 1.0))
+    center = rng.uniform(-1.0, 1.0, (centers, 3)) * np.array((0.0, 1.0, 1.0))
+    co = np.concatenate((half, mirrored, center)).astype(np.float32)
+    return co[rng.permutation(len(co))]
+
+
+def ngon_mesh():
+    """X について対称な n 角形を含むメッシュ（左右の五角形、中心をまたぐ六角形と四角形）"""
+    co = np.array(
+        [
+            (0.0, 0.0, 0.0),  # 0 中心
+            (0.0, 2.0, 0.0),  # 1 中心
+            (1.0, 0.0, 0.0),  # 2
+            (1.0, 2.0, 0.0),  # 3
+            (-1.0, 0.0, 0.0),  # 4
+            (-1.0, 2.0, 0.0),  # 5
+            (2.0, 0.5, 0.0),  # 6
+            (2.0, 1.5, 0.0),  # 7
+            (1.5, 2.5, 0.0),  # 8
+            (-2.0, 0.5, 0.0),  # 9
+            (-2.0, 1.5, 0.0),  # 10
+            (-1.5, 2.5, 0.0),  # 11
+            (0.0, -1.0, 0.0),  # 12 中心
+        ],
+        dtype=np.float32,
+    )
+    faces = [
+        (0, 2, 3, 1, 5, 4),  # 中心をまたぐ六角形
+        (2, 6, 7, 8, 3),  # +X の五角形
+        (4, 5, 11, 10, 9),  # -X の五角形（向きも反転）
+        (12, 2, 0, 4),  # 中心をまたぐ四角形
+    ]
+    loop_total = np.array([len(f) for f in faces], dtype=np.int32)
+    loop_start = np.r_[0, np.cumsum(loop_total)[:-1]].astype(np.int32)
+    loop_vert = np.concatenate(faces).astype(np.int32)
+    loop_face = np.repeat(np.arange(len(faces), dtype=np.int32), loop_total)
+    return co, loop_vert, loop_start, loop_total, loop_face
+
+
+def face_edge_array(loop_vert, loop_start, loop_total):
+    edges = set()
+    for start, total in zip(loop_start, loop_total):
+        verts = loop_vert[start : start + total]
+        for a, b in zip(verts, np.roll(verts, -1)):
+            edges.add((min(a, b), max(a, b)))
+    return np.array(sorted(edges), dtype=np.int64)
+
+
+# 頂点の対応
+
+
+def test_find_nearest_indices_matches_brute_force():
+    rng = np.random.default_rng(0)
+    points = rng.uniform(-1.0, 1.0, (2000, 3))
+    queries = np.concatenate((points[:500] + rng.normal(0.0, 0.01, (500, 3)), rng.uniform(-1.0, 1.0, (500, 3))))
+    threshold = 0.02
+
+    result = core.find_nearest_indices(points, queries, threshold)
+
+    dist = ((queries[:, None, :] - points[None, :, :]) ** 2).sum(axis=2)
+    nearest = dist.argmin(axis=1)
+    expected = np.where(dist[np.arange(len(queries)), nearest] <= threshold**2, nearest, -1)
+    np.testing.assert_array_equal(result, expected)
+
+
+def test_find_nearest_indices_empty():
+    assert len(core.find_nearest_indices(np.empty((0, 3)), np.zeros((4, 3)), 1e-4)) == 4
+    assert (core.find_nearest_indices(np.empty((0, 3)), np.zeros((4, 3)), 1e-4) == -1).all()
+    assert len(core.find_nearest_indices(np.zeros((4, 3)), np.empty((0, 3)), 1e-4)) == 0
+
+
+def test_x_mirror_map_is_involution_with_centers():
+    rng = np.random.default_rng(1)
+    co = symmetric_points(rng, 200, centers=20)
+    vert_map = core.find_x_mirror_indices(co)
+
+    assert (vert_map >= 0).all()
+    np.testing.assert_array_equal(vert_map[vert_map], np.arange(len(co)))
+    on_center = co[:, 0] == 0.0
+    np.testing.assert_array_equal(vert_map[on_center], np.flatnonzero(on_center))
+    np.testing.assert_allclose(co[vert_map, 0], -co[:, 0])
+
+
+def test_x_mirror_map_resolves_duplicates():
+    # 2つの -X 頂点が同じ +X 頂点の閾値内にある
+    co = np.array([(1.0, 0.0, 0.0), (-1.00005, 0.0, 0.0), (-1.0, 0.0, 0.0), (0.0, 1.0, 0.0)], dtype=np.float32)
+    vert_map = core.find_x_mirror_indices(co)
+    np.testing.assert_array_equal(vert_map, [2, -1, 0, 3])
+
+
+def test_x_mirror_map_dense_points_stay_one_to_one():
+    rng = np.random.default_rng(2)
+    for _ in range(20):
+        co = (np.round(rng.uniform(-1.0, 1.0, (300, 3)) * 20.0) / 20000.0).astype(np.float32)
+        vert_map = core.find_x_mirror_indices(co)
+        rows = np.flatnonzero(vert_map >= 0)
+        np.testing.assert_array_equal(vert_map[vert_map[rows]], rows)
+
+
+def test_identity_map_is_rejected():
+    co, loop_vert, loop_start, loop_total, _ = ngon_mesh()
+    edges = face_edge_array(loop_vert, loop_start, loop_total)
+    identity = np.arange(len(co))
+
+    assert not core.is_complete_mirror_map(identity, edges)
+    assert not core.mirror_map_fits(co, identity)
+
+    vert_map = core.find_x_mirror_indices(co)
+    assert core.is_complete_mirror_map(vert_map, edges)
+    assert core.mirror_map_fits(co, vert_map)
+
+
+def test_recovery_sides_and_mirror_positions():
+    rng = np.random.default_rng(3)
+    co = symmetric_points(rng, 50, centers=5)
+    vert_map = core.find_x_mirror_indices(co)
+    moved = co.copy()
+    moved[:, 0] += rng.normal(0.0, 1e-3, len(co)).astype(np.float32) * (co[:, 0] < 0)
+
+    is_target, targets, sources, centers = core.recovery_sides(moved, vert_map, positive_source=True)
+    assert (moved[targets, 0] < 0).all()
+    assert (moved[sources, 0] > 0).all()
+    assert is_target.sum() == 50
+
+    result = core.mirror_positions(moved.copy(), targets, sources, centers)
+    np.testing.assert_allclose(result[vert_map, 0], -result[:, 0])
+    np.testing.assert_array_equal(result[co[:, 0] > 0], moved[co[:, 0] > 0])
+
+
+def test_recovery_sides_with_mask():
+    co = np.array([(-1.0, 0.0, 0.0), (1.0, 0.0, 0.0), (-2.0, 0.0, 0.0), (2.0, 0.0, 0.0), (0.0, 1.0, 0.0)])
+    vert_map = np.array([1, 0, 3, 2, 4])
+    mask = np.array([False, True, False, False, False])
+    _, targets, sources, centers = core.recovery_sides(co, vert_map, True, mask)
+    np.testing.assert_array_equal(targets, [0])
+    np.testing.assert_array_equal(sources, [1])
+    assert len(centers) == 0
+
+
+def test_recovery_loops_keep_source_side_of_straddling_face():
+    # X=0 をまたぐ四角形1枚（中心の頂点なし）は自身に写る
+    co = np.array([(-1.0, 0.0, 0.0), (1.0, 0.0, 0.0), (1.0, 1.0, 0.0), (-1.0, 1.0, 0.0)], dtype=np.float32)
+    loop_vert = np.array([0, 1, 2, 3], dtype=np.int32)
+    loop_start = np.array([0], dtype=np.int32)
+    loop_total = np.array([4], dtype=np.int32)
+    loop_face = np.zeros(4, dtype=np.int32)
+    vert_map, _, loop_map = core.build_mirror_maps(co, loop_vert, loop_start, loop_total, loop_face)
+    is_target, _, _, centers = core.recovery_sides(co, vert_map, positive_source=True)
+
+    loops = core.recovery_loops(is_target, centers, loop_vert, loop_start, loop_face, loop_map)
+    np.testing.assert_array_equal(loop_vert[loops], [0, 3])
+
+    uv = np.array([(0.2, 0.0), (0.8, 0.0), (0.8, 1.0), (0.25, 1.0)])
+    uv[loops] = core.mirror_uv(uv[loop_map[loops]], 0.5)
+    np.testing.assert_allclose(uv[:, 0], [0.2, 0.8, 0.8, 0.2])
+
+
+# 面とループの対応
+
+
+def test_mirror_maps_on_ngons():
+    co, loop_vert, loop_start, loop_total, loop_face = ngon_mesh()
+    vert_map, face_map, loop_map = core.build_mirror_maps(co, loop_vert, loop_start, loop_total, loop_face)
+
+    np.testing.assert_array_equal(face_map, [0, 2, 1, 3])
+    assert (loop_map >= 0).all()
+    np.testing.assert_array_equal(loop_map[loop_map], np.arange(len(loop_vert)))
+    np.testing.assert_array_equal(loop_vert[loop_map], vert_map[loop_vert])
+    np.testing.assert_array_equal(loop_face[loop_map], face_map[loop_face])
+
+
+def test_mirror_faces_require_same_vertex_set():
+    co, loop_vert, loop_start, loop_total, _ = ngon_mesh()
+    vert_map = core.find_x_mirror_indices(co)
+    vert_map[11] = -1
+    face_map = core.find_mirror_faces(loop_vert, loop_start, loop_total, vert_map)
+    assert face_map[2] == -1
+    assert face_map[0] == 0
+
+
+def test_fan_triangles_and_face_edges():
+    loop_start = np.array([0, 4, 7])
+    loop_total = np.array([4, 3, 5])
+    tris = core.fan_triangles(loop_start, loop_total)
+    np.testing.assert_array_equal(tris, [(0, 1, 2), (0, 2, 3), (4, 5, 6), (7, 8, 9), (7, 9, 10), (7, 10, 11)])
+    edges = core.face_edges(loop_start, loop_total)
+    assert len(edges) == 12
+    np.testing.assert_array_equal(edges[:4], [(0, 1), (1, 2), (2, 3), (3, 0)])
+    np.testing.assert_array_equal(edges[-1], (11, 7))
+
+
+# 名前とウェイト
+
+
+def test_pair_names():
+    names = ["Arm_L", "Arm_R", "Head", "Leg.L", "Hand_L", "Leg.R"]
+    partner = core.pair_names(names, utils_mirror.get_mirror_name)
+    np.testing.assert_array_equal(partner, [1, 0, 2, 5, 4, 3])
+    np.testing.assert_array_equal(partner[partner], np.arange(len(names)))
+
+
+def test_weight_swap_edits_match_dict_swap():
+    partner = np.array([1, 0, 2, 4, 3], dtype=np.int32)
+    dicts = [{0: 0.5, 1: 0.25, 2: 1.0}, {0: 0.75}, {3: 0.0, 4: 0.5}, {2: 0.3}]
+    items = [list(d.items()) for d in dicts]
+    offsets = np.r_[0, np.cumsum([len(it) for it in items])]
+    group_ids = np.array([g for it in items for g, _ in it], dtype=np.int32)
+    weights = np.array([w for it in items for _, w in it])
+
+    (rows, new_ids, values), (del_rows, del_ids) = core.weight_swap_edits(
+        offsets, group_ids, core.swap_weight_groups(partner, group_ids), weights
+    )
+    for row, vg_id, weight in zip(rows, new_ids, values):
+        dicts[row][vg_id] = weight
+    for row, vg_id in zip(del_rows, del_ids):
+        del dicts[row][vg_id]
+
+    assert dicts == [{0: 0.25, 1: 0.5, 2: 1.0}, {1: 0.75}, {3: 0.5}, {2: 0.3}]
+    assert 2 not in new_ids
+
+
+def test_unsymmetrize_key_keeps_only_masked_side():
+    basis = np.array([(-1.0, 0.0, 0.0), (1.0, 0.0, 0.0), (0.0, 1.0, 0.0)], dtype=np.float32)
+    source = basis + np.array((0.0, 0.0, 1.0), dtype=np.float32)
+    target = basis.copy()
+    mask_indices = np.array([1])
+    core.unsymmetrize_key(source, target, basis[mask_indices], mask_indices)
+    np.testing.assert_allclose(source[1], basis[1])
+    np.testing.assert_allclose(target[1], basis[1] + (0.0, 0.0, 1.0))
+
+
+# UVグループ
+
+
+def test_remap_face_groups_keeps_out_of_range():
+    face_group = np.array([0, 1, 2, 3, -1, 7], dtype=np.int32)
+    lut = np.array([0, 2, 1, 3])
+    np.testing.assert_array_equal(core.remap_face_groups(face_group, lut), [0, 2, 1, 3, -1, 7])
+
+
+def test_faces_all_selected():
+    loop_select = np.array([1, 1, 1, 0, 1, 1, 1, 1], dtype=bool)
+    selected = core.faces_all_selected(loop_select, np.array([0, 3, 5, 8]), np.array([3, 2, 3, 0]))
+    np.testing.assert_array_equal(selected, [True, False, True, False])
+
+
+def test_partition_preview_groups():
+    rng = np.random.default_rng(4)
+    loop_start = np.array([0, 4, 7, 11])
+    loop_total = np.array([4, 3, 4, 2])
+    uv = rng.random((13, 2)).astype(np.float32)
+    face_group = np.array([1, 0, 1, 5])
+
+    groups, mean_v = core.partition_preview_groups(uv, loop_start, loop_total, face_group, 3)
+
+    assert len(groups) == 3
+    np.testing.assert_array_equal(groups[0][0], [4, 5, 6])
+    np.testing.assert_array_equal(groups[1][0], [0, 1, 2, 3, 7, 8, 9, 10])
+    assert len(groups[2][0]) == 0
+    np.testing.assert_array_equal(groups[1][1], [(0, 1, 2), (0, 2, 3), (4, 5, 6), (4, 6, 7)])
+    np.testing.assert_array_equal(groups[1][2][-1], (7, 4))
+    assert mean_v[1] == pytest.approx(uv[groups[1][0], 1].mean())
+    assert mean_v[2] == 0.0
+
+
+def test_mirror_preview_group():
+    uv = np.array([(0.2, 0.1), (0.5, 0.2), (0.8, 0.3)], dtype=np.float32)
+    result = core.mirror_preview_group(uv, np.array([0, 1, 2]), 0.5, 0.25)
+    np.testing.assert_allclose(result, [(0.8, 0.35), (0.5, 0.45), (0.2, 0.55)], atol=1e-6)
+    assert result.dtype == np.float32
+
+
+def test_mirror_preview_group_snaps_near_pivot():
+    uv = np.array([(0.50005, 0.0), (0.5002, 0.0)])
+    result = core.mirror_preview_group(uv, np.array([0, 1]), 0.5, 0.0)
+    np.testing.assert_allclose(result[:, 0], [0.5, 0.4998], atol=1e-6)
+    # 対称化の操作側は従来どおり 1e-5 で、軸に揃えない
+    np.testing.assert_allclose(core.mirror_uv(uv, 0.5)[0, 0], 0.49995, atol=1e-9)
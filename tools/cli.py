@@ -0,0 +1,343 @@
+"""コマンドラインから .blend ファイルをまとめて対称化する
+
+ドライバー（Blender なしの Python でも、blender -b --python でも実行できる）:
+
+  python tools/cli.py [options] FILE_OR_GLOB ...
+  blender -b --python tools/cli.py -- [options] FILE_OR_GLOB ...
+
+  --workers 8                 Blender のワーカープロセス数（既定: CPU 数）
+  --blender /path/to/blender  ワーカーに使う Blender（既定: 実行中の Blender か PATH の blender）
+  --set name=value            オペレーターのオプション（例: --set uvmap=true --set direction=-X）
+  --objects Body Hair         対象のオブジェクト名（既定: すべてのメッシュ）
+  --addon-module NAME         アドオンのモジュール名（既定: リポジトリのディレクトリ名。
+                              拡張機能としてインストール済みなら bl_ext.user_default.mio3_symmetry など）
+  --output-dir DIR            結果を DIR に保存する（入力ファイルの共通のディレクトリからの相対パスを保つ）
+  --in-place                  元のファイルに上書き保存する（どちらもなければ保存しない）
+  --timeout 600               1ファイルあたりの制限時間（秒）
+  --report report.json        結果の書き出し先（省略時は標準出力）
+
+ワーカーは blender -b --factory-startup --python tools/cli.py -- --worker として起動され、
+標準入力から1行1件のジョブを受け取り、結果を1行の JSON で返す。
+ファイルの失敗やワーカーの異常終了はそのファイルの結果に記録し、残りの処理は続ける。
+"""
+
+import argparse
+import glob
+import json
+import os
+import queue
+import shutil
+import subprocess
+import sys
+import threading
+import time
+import traceback
+
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULT_PREFIX = "MIO3SYM_RESULT "
+
+
+def script_args():
+    return sys.argv[sys.argv.index("--") + 1 :] if "--" in sys.argv else sys.argv[1:]
+
+
+def parse_value(text):
+    lowered = text.lower()
+    if lowered in ("true", "false"):
+        return lowered == "true"
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def parse_options(items):
+    options = {}
+    for item in items:
+        name, sep, value = item.partition("=")
+        if not sep:
+            raise SystemExit("--set expects name=value: {}".format(item))
+        options[name.strip()] = parse_value(value.strip())
+    return options
+
+
+# ワーカー
+
+
+def default_addon_module():
+    name = os.path.basename(ADDON_DIR)
+    if not name.isidentifier():
+        raise SystemExit(
+            "cannot import the add-on from '{}': not a valid module name. "
+            "Rename the directory or pass --addon-module".format(ADDON_DIR)
+        )
+    return name
+
+
+def worker_main(addon_module):
+    import addon_utils
+
+    sys.path.insert(0, os.path.dirname(ADDON_DIR))
+    if addon_utils.enable(addon_module, default_set=True) is None:
+        raise SystemExit("failed to enable add-on module '{}'".format(addon_module))
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        job = json.loads(line)
+        start = time.perf_counter()
+        try:
+            result = process_file(job, addon_module)
+            result["ok"] = True
+        except Exception:
+            result = {"ok": False, "error": traceback.format_exc()}
+        result["file"] = job["file"]
+        result["time"] = time.perf_counter() - start
+        sys.stdout.write(RESULT_PREFIX + json.dumps(result, ensure_ascii=False) + "\n")
+        sys.stdout.flush()
+
+
+def process_file(job, addon_module):
+    import bpy
+
+    bpy.ops.wm.open_mainfile(filepath=job["file"], load_ui=False)
+    context = bpy.context
+    view_layer = context.view_layer
+
+    names = set(job.get("objects") or ())
+    targets = [
+        o
+        for o in view_layer.objects
+        if o.type == "MESH"
+        and o.library is None
+        and o.override_library is None
+        and (not names or o.name in names)
+        and o.visible_get()
+    ]
+    result = {"objects": [], "stages": [], "verts_before": 0, "verts_after": 0}
+    if not targets:
+        return result
+
+    if context.object is not None and context.object.mode != "OBJECT":
+        bpy.ops.object.mode_set(mode="OBJECT")
+    for o in view_layer.objects:
+        o.select_set(False)
+    for o in targets:
+        o.select_set(True)
+    view_layer.objects.active = targets[0]
+
+    profiler = sys.modules[addon_module + ".profiler"]
+    profiler.last_record = None
+    status = bpy.ops.object.mio3_symmetry(selected_objects=True, **job.get("options", {}))
+    if "FINISHED" not in status:
+        raise RuntimeError("operator returned {}".format(sorted(status)))
+
+    if (record := profiler.last_record) is not None:
+        result.update(
+            objects=record["objects"],
+            stages=record["stages"],
+            verts_before=record["verts_before"],
+            verts_after=record["verts_after"],
+            operator_time=record["total_time"],
+        )
+
+    if job.get("output"):
+        bpy.ops.wm.save_as_mainfile(filepath=job["output"], copy=True)
+        result["output"] = job["output"]
+    return result
+
+
+# ドライバー
+
+
+class Worker:
+    """Blender のワーカープロセス1つ（異常終了したら次のジョブで起動し直す）"""
+
+    def __init__(self, blender, addon_module):
+        self.blender = blender
+        self.addon_module = addon_module
+        self.process = None
+        self.lines = None
+
+    def start(self):
+        command = [
+            self.blender,
+            "--background",
+            "--factory-startup",
+            "--python",
+            os.path.abspath(__file__),
+            "--",
+            "--worker",
+            "--addon-module",
+            self.addon_module,
+        ]
+        self.process = subprocess.Popen(
+            command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+            bufsize=1,
+        )
+        self.lines = queue.Queue()
+        threading.Thread(target=self._read, args=(self.process, self.lines), daemon=True).start()
+
+    @staticmethod
+    def _read(process, lines):
+        for line in process.stdout:
+            if line.startswith(RESULT_PREFIX):
+                lines.put(line[len(RESULT_PREFIX) :])
+        lines.put(None)
+
+    def run(self, job, timeout):
+        if self.process is None or self.process.poll() is not None:
+            self.start()
+        try:
+            self.process.stdin.write(json.dumps(job, ensure_ascii=False) + "\n")
+            self.process.stdin.flush()
+            line = self.lines.get(timeout=timeout)
+        except queue.Empty:
+            self.process.kill()
+            self.process.wait()
+            self.process = None
+            return {"file": job["file"], "ok": False, "error": "timed out after {} s".format(timeout)}
+        except OSError as e:
+            line = None
+            error = str(e)
+        else:
+            error = None
+
+        if line is None:
+            code = self.process.wait()
+            self.process = None
+            return {"file": job["file"], "ok": False, "error": error or "worker exited with code {}".format(code)}
+        return json.loads(line)
+
+    def stop(self):
+        if self.process is None:
+            return
+        if self.process.poll() is None:
+            self.process.stdin.close()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        self.process = None
+
+
+def collect_files(patterns):
+    files = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern, recursive=True)) if glob.has_magic(pattern) else [pattern]
+        files.extend(os.path.abspath(path) for path in matches)
+    return list(dict.fromkeys(files))
+
+
+def output_paths(files, output_dir):
+    """入力ファイルの共通のディレクトリからの相対パスで出力先を決める（同じ出力先になる場合はエラー）"""
+    root = os.path.commonpath([os.path.dirname(path) for path in files]) if files else ""
+    outputs = [os.path.join(output_dir, os.path.relpath(path, root)) for path in files]
+    seen = {}
+    for path, output in zip(files, outputs):
+        key = os.path.normcase(output)
+        if key in seen:
+            raise SystemExit("{} and {} would be saved to the same file {}".format(seen[key], path, output))
+        seen[key] = path
+    return outputs
+
+
+def default_blender():
+    try:
+        import bpy
+
+        return bpy.app.binary_path
+    except ImportError:
+        return shutil.which("blender") or "blender"
+
+
+def driver_main(argv):
+    parser = argparse.ArgumentParser(prog="tools/cli.py")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--blender", default="")
+    parser.add_argument("--addon-module", default="")
+    parser.add_argument("--set", dest="options", action="append", default=[])
+    parser.add_argument("--objects", nargs="+", default=[])
+    parser.add_argument("--output-dir", default="")
+    parser.add_argument("--in-place", action="store_true")
+    parser.add_argument("--timeout", type=float, default=None)
+    parser.add_argument("--report", default="")
+    args = parser.parse_args(argv)
+
+    options = parse_options(args.options)
+    files = collect_files(args.files)
+    addon_module = args.addon_module or default_addon_module()
+    if args.output_dir:
+        outputs = output_paths(files, os.path.abspath(args.output_dir))
+        for output in outputs:
+            os.makedirs(os.path.dirname(output), exist_ok=True)
+    else:
+        outputs = [path if args.in_place else "" for path in files]
+
+    jobs = queue.Queue()
+    for path, output in zip(files, outputs):
+        jobs.put({"file": path, "output": output, "options": options, "objects": args.objects})
+
+    results = []
+    lock = threading.Lock()
+    blender = args.blender or default_blender()
+
+    def consume():
+        worker = Worker(blender, addon_module)
+        try:
+            while True:
+                try:
+                    job = jobs.get_nowait()
+                except queue.Empty:
+                    return
+                result = worker.run(job, args.timeout)
+                with lock:
+                    results.append(result)
+                    status = "ok" if result["ok"] else "FAILED"
+                    print("[{}/{}] {} {}".format(len(results), len(files), status, job["file"]), file=sys.stderr)
+        finally:
+            worker.stop()
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=consume) for _ in range(max(1, min(args.workers, len(files))))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    order = {path: i for i, path in enumerate(files)}
+    results.sort(key=lambda r: order.get(r["file"], len(order)))
+    report = {
+        "blender": blender,
+        "workers": len(threads),
+        "options": options,
+        "total_time": time.perf_counter() - start,
+        "failed": sum(not r["ok"] for r in results),
+        "files": results,
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+    return 1 if report["failed"] else 0
+
+
+def main():
+    argv = script_args()
+    if "--worker" in argv:
+        worker_main(argv[argv.index("--addon-module") + 1])
+    else:
+        sys.exit(driver_main(argv))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,10 @@
 import sys
 import bpy
-import time
+import numpy as np
 from bpy.types import Operator
-from mathutils import kdtree
+from .common import NAME_ATTR_GROUP
+from .profiler import StageProfiler
+from .core import weight_swap_edits
 
 DEBUG = bool("--python" in sys.argv)
 
@@ -41,16 +43,29 @@ def check_unregister(cls):
             pass
 
 
+def get_preferences():
+    return bpy.context.preferences.addons[__package__].preferences
+
+
+def create_profiler(name):
+    return StageProfiler(name, trace_memory=get_preferences().profile_memory)
+
+
+def finish_profiler(profiler, **info):
+    log_path = get_preferences().profile_log_path
+    return profiler.finish(bpy.path.abspath(log_path) if log_path else "", **info)
+
+
 class Mio3SYMDebug:
-    _start_time = 0
+    profiler = None
 
     def start_time(self):
-        if DEBUG:
-            self._start_time = time.time()
+        self.profiler = create_profiler(self.bl_idname)
 
     def print_time(self):
+        record = finish_profiler(self.profiler)
         if DEBUG:
-            print("Time: {}".format(time.time() - self._start_time))
+            print("Time: {}".format(record["total_time"]))
 
     def print(self, msg):
         if DEBUG:
@@ -79,20 +94,71 @@ class Mio3SYMOperator(Mio3SYMDebug, Operator):
         return obj is not None and obj.library is None and obj.override_library is None
 
 
-def find_x_mirror_verts(bm, selected_verts):
-    kd = kdtree.KDTree(len(bm.verts))
-    for i, v in enumerate(bm.verts):
-        kd.insert(v.co, i)
-    kd.balance()
-
-    mirror_verts = set()
-    for v in selected_verts:
-        mirror_co = v.co.copy()
-        mirror_co.x = -mirror_co.x
-        _, index, dist = kd.find(mirror_co)
-        if dist < 0.0001:
-            mirror_vert = bm.verts[index]
-            if mirror_vert not in selected_verts:
-                mirror_verts.add(mirror_vert)
-
-    return mirror_verts
+def read_deform_weights(dverts):
+    """BMDeformVertのウェイトをCSR形式の配列にまとめて返す"""
+    items = [dv.items() for dv in dverts]
+    counts = np.fromiter(map(len, items), dtype=np.int64, count=len(items))
+    offsets = np.zeros(len(items) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    total = int(offsets[-1])
+    group_ids = np.fromiter((vg_id for it in items for vg_id, _ in it), dtype=np.int32, count=total)
+    weights = np.fromiter((w for it in items for _, w in it), dtype=np.float64, count=total)
+    return offsets, group_ids, weights
+
+
+def write_deform_weights(dverts, offsets, group_ids, swapped_ids, weights):
+    """入れ替えたグループのエントリだけをBMDeformVertに書き戻す"""
+    (rows, new_ids, values), (del_rows, del_ids) = weight_swap_edits(offsets, group_ids, swapped_ids, weights)
+    for row, vg_id, weight in zip(rows.tolist(), new_ids.tolist(), values.tolist()):
+        dverts[row][vg_id] = weight
+    for row, vg_id in zip(del_rows.tolist(), del_ids.tolist()):
+        del dverts[row][vg_id]
+
+
+def get_vertex_coords(mesh):
+    co = np.empty((len(mesh.vertices), 3), dtype=np.float32)
+    mesh.vertices.foreach_get("co", co.ravel())
+    return co
+
+
+def get_loop_topology(mesh):
+    """ループの頂点インデックス、面の開始位置、ループ数、ループが属する面を返す"""
+    l_len, p_len = len(mesh.loops), len(mesh.polygons)
+    loop_vert = np.empty(l_len, dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", loop_vert)
+    loop_start = np.empty(p_len, dtype=np.int32)
+    mesh.polygons.foreach_get("loop_start", loop_start)
+    loop_total = np.empty(p_len, dtype=np.int32)
+    mesh.polygons.foreach_get("loop_total", loop_total)
+    loop_face = np.repeat(np.arange(p_len, dtype=np.int32), loop_total)
+    return loop_vert, loop_start, loop_total, loop_face
+
+
+def get_face_centers(mesh):
+    centers = np.empty((len(mesh.polygons), 3), dtype=np.float32)
+    mesh.polygons.foreach_get("center", centers.ravel())
+    return centers
+
+
+def get_corner_normals(mesh):
+    normals = np.empty((len(mesh.loops), 3), dtype=np.float32)
+    mesh.corner_normals.foreach_get("vector", normals.ravel())
+    return normals
+
+
+def get_face_groups(mesh):
+    """面ごとのUVグループ番号（属性がなければ None）"""
+    attr = mesh.attributes.get(NAME_ATTR_GROUP)
+    if attr is None or attr.domain != "FACE" or attr.data_type != "INT":
+        return None
+    face_group = np.empty(len(mesh.polygons), dtype=np.int32)
+    attr.data.foreach_get("value", face_group)
+    return face_group
+
+
+def get_uv_group_table(obj, dtype=np.float64):
+    """UVグループごとの対称の中心Uとオフセット"""
+    uv_group = obj.mio3qs.uv_group
+    coord_u = np.array([it.uv_coord_u for it in uv_group.items], dtype=dtype)
+    offset_v = np.array([it.uv_offset_v for it in uv_group.items], dtype=dtype)
+    return coord_u, offset_v